@@ -0,0 +1,19 @@
+import pytest
+
+# 测试渲染出的 HTML，只在测试失败时才输出
+_HTML_DUMPS = pytest.StashKey[list]()
+
+
+@pytest.fixture
+def dump_html(request):
+    """记录渲染结果，测试失败时附加到报告中，成功时不产生任何输出"""
+    return request.node.stash.setdefault(_HTML_DUMPS, []).append
+
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_makereport(item, call):
+    outcome = yield
+    report = outcome.get_result()
+    if report.failed:
+        for html in item.stash.get(_HTML_DUMPS, []):
+            report.sections.append(("rendered html", html))
@@ -5,7 +5,8 @@ Test cases for cli.py
 """
 import pytest
 from pathlib import Path
-from wx.cli import check_missing_images
+from unittest.mock import Mock, patch
+from wx.cli import check_missing_images, post_articles
 from wx.md_file import MarkdownFile
 
 
@@ -64,8 +65,8 @@ tags = ["test"]
 
     # 验证结果
     assert len(result) == 1
-    assert result[0]["filename"] == "test2.md"
-    assert result[0]["missing_images"] == ["images/missing.png"]
+    assert result[0].filename == "test2.md"
+    assert result[0].missing_images == ["images/missing.png"]
 
 
 def test_check_missing_images_empty_directory(tmp_path):
@@ -139,5 +140,57 @@ tags = ["test"]
 
     # 验证结果
     assert len(result) == 1
-    assert result[0]["filename"] == "test2.md"
-    assert result[0]["missing_images"] == ["images/missing.png"]
+    assert result[0].filename == "test2.md"
+    assert result[0].missing_images == ["images/missing.png"]
+
+
+def test_post_articles_skips_files_with_missing_images(tmp_path):
+    """测试发布时并行提取文件，跳过有缺失图片的文件"""
+    test_dir = tmp_path / "test_data"
+    test_dir.mkdir()
+    for i in range(5):
+        (test_dir / f"ok{i}.md").write_text(f"""+++
+title = "Article {i}"
++++
+# Article {i}
+""")
+    (test_dir / "broken.md").write_text("""+++
+title = "Broken"
++++
+![missing](images/missing.png)
+""")
+
+    publisher = Mock()
+    publisher.cache.get.return_value = None
+    publisher.publish_multi_articles.return_value = ["media_id"] * 5
+    with patch("wx.cli.create_wx_objects",
+               return_value=(Mock(), publisher, Mock())):
+        assert post_articles(str(test_dir)) is True
+
+    published, = publisher.publish_multi_articles.call_args.args
+    assert sorted(md_file.base_name for md_file in published) == [
+        f"ok{i}.md" for i in range(5)]
+
+
+def test_post_articles_does_not_extract_published_files(tmp_path):
+    """测试已在缓存中的文章不会被解析"""
+    test_dir = tmp_path / "test_data"
+    test_dir.mkdir()
+    for name in ("published.md", "new.md"):
+        (test_dir / name).write_text(f"""+++
+title = "{name}"
++++
+# {name}
+""")
+
+    publisher = Mock()
+    publisher.cache.get.side_effect = lambda path: (
+        ["media_id", None] if path.endswith("published.md") else None)
+    publisher.publish_multi_articles.return_value = ["media_id"]
+    with patch("wx.cli.create_wx_objects",
+               return_value=(Mock(), publisher, Mock())), \
+            patch("wx.cli.MarkdownFile.extract",
+                  wraps=MarkdownFile.extract) as extract:
+        assert post_articles(str(test_dir)) is True
+
+    assert [call.args[1] for call in extract.call_args_list] == ["new.md"]
@@ -137,3 +137,26 @@ def test_front_matter():
         "Second paragraph\n"
     )
     assert processor.process_content(content) == expected
+
+
+def test_crlf_line_endings():
+    """Test that Windows line endings take the line-by-line path."""
+    processor = EmptyLineProcessor()
+    content = "First\r\n\r\n\r\nSecond\r\n```\r\n\r\n\r\ncode\r\n```\r\n"
+    expected = "First\r\n\r\nSecond\r\n```\r\n\r\n\r\ncode\r\n```\r\n"
+    assert processor.process_content(content) == expected
+
+
+@pytest.mark.parametrize("content", [
+    "\n\n\nStart\n  \n\t\n\nEnd  \n \n",
+    "---\ntitle: x\n\n\n---\n\n\nBody\n\n\n```py\n\n\n  ---\n\n\n```\n\n\nTail",
+    "Para\n\n\n  ```\n\n\n--- \n\n\n```\n\n\n---\n\n\n",
+    "- a\n\n\n- b\n\n\n1. c\n\n\n　\n\n",
+])
+def test_regex_and_line_paths_agree(content):
+    """Test that the regex fast path matches the line-by-line processing."""
+    processor = EmptyLineProcessor()
+    expected = processor._process_lines(content)
+    if not expected.endswith("\n"):
+        expected += "\n"
+    assert processor.process_content(content) == expected
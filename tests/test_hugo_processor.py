@@ -1,13 +1,24 @@
+import itertools
 import os
-import tempfile
 import pytest
 from pathlib import Path
 from typing import Dict, Any
-from tempfile import NamedTemporaryFile
 from unittest.mock import patch
 
 from wx.hugo_processor import HugoProcessor, FormatViolation
 
+# 测试用的伪图片内容
+SAMPLE_IMG = b"fake image content"
+NESTED_IMG = b"nested image content"
+CONFLICT_IMG_1 = b"image content 1"
+CONFLICT_IMG_2 = b"image content 2"
+TEST1_IMG = b"test1 content"
+TEST2_IMG = b"test2 content"
+OLD_IMG = b"old content"
+FAKE_JPG = b"fake jpg"
+FAKE_PNG = b"fake png"
+OLD_JPG = b"old jpg"
+
 
 def test_hugo_processor_initialization_with_valid_config():
     # Arrange
@@ -57,15 +68,39 @@ def test_hugo_processor_initialization_with_invalid_paths():
     assert "Invalid path" in str(exc_info.value)
 
 
-def create_temp_markdown_file(content: str) -> Path:
-    """Helper function to create a temporary markdown file with given content."""
-    temp_file = NamedTemporaryFile(delete=False, suffix='.md')
-    temp_file.write(content.encode('utf-8'))
-    temp_file.close()
-    return Path(temp_file.name)
+@pytest.fixture
+def md_factory(tmp_path):
+    """Factory fixture: write content to a new markdown file under tmp_path."""
+    counter = itertools.count()
+
+    def _make(content: str) -> Path:
+        md_file = tmp_path / f"t{next(counter)}.md"
+        md_file.write_bytes(content.encode('utf-8'))
+        return md_file
+    return _make
+
 
+@pytest.fixture
+def hugo_env(monkeypatch, tmp_path):
+    """Factory fixture: point HUGO_TARGET_HOME at a temp dir and build a processor.
 
-def test_check_format_with_consistent_key_value_format():
+    Returns a callable taking the source directory and returning
+    ``(hugo_home, processor)``.
+    """
+    hugo_home = tmp_path / "hugo"
+    hugo_home.mkdir()
+    monkeypatch.setenv("HUGO_TARGET_HOME", str(hugo_home))
+
+    def _make(source_dir):
+        return hugo_home, HugoProcessor({
+            'source_dir': str(source_dir),
+            'target_dir': str(Path(hugo_home, "content", "blog")),
+            'image_dir': str(Path(hugo_home, "static", "img", "blog"))
+        })
+    return _make
+
+
+def test_check_format_with_consistent_key_value_format(md_factory):
     # Arrange
     content = """---
 title="Test Article"
@@ -74,7 +109,7 @@ date="2024-04-04"
 ---
 # Content here
 """
-    md_file = create_temp_markdown_file(content)
+    md_file = md_factory(content)
     processor = HugoProcessor(
         {'source_dir': str(md_file.parent), 'target_dir': '/tmp', 'image_dir': '/tmp'})
 
@@ -84,11 +119,8 @@ date="2024-04-04"
     # Assert
     assert len(violations) == 0
 
-    # Cleanup
-    md_file.unlink()
 
-
-def test_check_format_with_mixed_formats():
+def test_check_format_with_mixed_formats(md_factory):
     # Arrange
     content = """---
 title="Test Article"
@@ -97,7 +129,7 @@ date="2024-04-04"
 ---
 # Content here
 """
-    md_file = create_temp_markdown_file(content)
+    md_file = md_factory(content)
     processor = HugoProcessor(
         {'source_dir': str(md_file.parent), 'target_dir': '/tmp', 'image_dir': '/tmp'})
 
@@ -112,16 +144,13 @@ date="2024-04-04"
     assert "Mixed format" in violation.message
     assert "description: A test article" in violation.message
 
-    # Cleanup
-    md_file.unlink()
-
 
-def test_check_format_with_missing_front_matter():
+def test_check_format_with_missing_front_matter(md_factory):
     # Arrange
     content = """# Just content
 No front matter here
 """
-    md_file = create_temp_markdown_file(content)
+    md_file = md_factory(content)
     processor = HugoProcessor(
         {'source_dir': str(md_file.parent), 'target_dir': '/tmp', 'image_dir': '/tmp'})
 
@@ -135,11 +164,27 @@ No front matter here
     assert violation.line_number == 1
     assert "Missing front matter" in violation.message
 
-    # Cleanup
-    md_file.unlink()
+
+def test_check_format_with_unclosed_front_matter(md_factory):
+    # Arrange
+    content = """---
+title="Test Article"
+# Content here
+"""
+    md_file = md_factory(content)
+    processor = HugoProcessor(
+        {'source_dir': str(md_file.parent), 'target_dir': '/tmp', 'image_dir': '/tmp'})
+
+    # Act
+    violations = processor.check_format(md_file)
+
+    # Assert
+    assert len(violations) == 1
+    assert violations[0].line_number == 1
+    assert "missing closing '---'" in violations[0].message
 
 
-def test_standardize_format_with_mixed_formats():
+def test_standardize_format_with_mixed_formats(md_factory):
     # Arrange
     content = """---
 title="Test Article"
@@ -150,7 +195,7 @@ categories: [cat1, cat2]
 ---
 # Content here
 """
-    md_file = create_temp_markdown_file(content)
+    md_file = md_factory(content)
     processor = HugoProcessor(
         {'source_dir': str(md_file.parent), 'target_dir': '/tmp', 'image_dir': '/tmp'})
 
@@ -169,11 +214,8 @@ categories=["cat1", "cat2"]
 """
     assert standardized_content == expected_content
 
-    # Cleanup
-    md_file.unlink()
-
 
-def test_standardize_format_with_already_standard_format():
+def test_standardize_format_with_already_standard_format(md_factory):
     # Arrange
     content = """---
 title="Test Article"
@@ -182,7 +224,7 @@ date="2024-04-04"
 ---
 # Content here
 """
-    md_file = create_temp_markdown_file(content)
+    md_file = md_factory(content)
     processor = HugoProcessor(
         {'source_dir': str(md_file.parent), 'target_dir': '/tmp', 'image_dir': '/tmp'})
 
@@ -192,16 +234,13 @@ date="2024-04-04"
     # Assert
     assert standardized_content == content
 
-    # Cleanup
-    md_file.unlink()
-
 
-def test_standardize_format_with_missing_front_matter():
+def test_standardize_format_with_missing_front_matter(md_factory):
     # Arrange
     content = """# Just content
 No front matter here
 """
-    md_file = create_temp_markdown_file(content)
+    md_file = md_factory(content)
     processor = HugoProcessor(
         {'source_dir': str(md_file.parent), 'target_dir': '/tmp', 'image_dir': '/tmp'})
 
@@ -217,11 +256,8 @@ No front matter here
 """
     assert standardized_content == expected_content
 
-    # Cleanup
-    md_file.unlink()
 
-
-def test_standardize_format_with_complex_values():
+def test_standardize_format_with_complex_values(md_factory):
     # Arrange
     content = """---
 title: "Article with: colon"
@@ -232,7 +268,7 @@ nested: {key: value, other: stuff}
 ---
 # Content here
 """
-    md_file = create_temp_markdown_file(content)
+    md_file = md_factory(content)
     processor = HugoProcessor(
         {'source_dir': str(md_file.parent), 'target_dir': '/tmp', 'image_dir': '/tmp'})
 
@@ -251,8 +287,30 @@ nested={"key": "value", "other": "stuff"}
 """
     assert standardized_content == expected_content
 
-    # Cleanup
-    md_file.unlink()
+
+# 已经符合空行规范的内容，处理后应保持不变
+EMPTY_LINES_INPUT = [
+    "---",
+    'title="Test"',
+    'date="2024-04-04"',
+    "---",
+    "",
+    "First paragraph",
+    "",
+    "```python",
+    "def test():",
+    "",
+    "    return None",
+    "```",
+    "",
+    "- List item 1",
+    "- List item 2",
+    "",
+    "- New group item",
+    "",
+    "Last paragraph",
+]
+EMPTY_LINES_EXPECTED = list(EMPTY_LINES_INPUT)
 
 
 def test_remove_empty_lines():
@@ -263,33 +321,14 @@ def test_remove_empty_lines():
         "image_dir": "test_images"
     }
     processor = HugoProcessor(config)
-    content = (
-        "---\n"
-        "title=\"Test\"\n"
-        "date=\"2024-04-04\"\n"
-        "---\n"
-        "\n"
-        "First paragraph\n"
-        "\n"
-        "```python\n"
-        "def test():\n"
-        "\n"
-        "    return None\n"
-        "```\n"
-        "\n"
-        "- List item 1\n"
-        "- List item 2\n"
-        "\n"
-        "- New group item\n"
-        "\n"
-        "Last paragraph"
-    )
+    content = "\n".join(EMPTY_LINES_INPUT)
+    expected = "\n".join(EMPTY_LINES_EXPECTED)
     result = processor.remove_empty_lines(content)
     # 由于文件末尾可以有或没有换行符，我们只需要比较内容部分
-    assert result.rstrip('\n') == content.rstrip('\n')
+    assert result.rstrip('\n') == expected
 
 
-def test_process_file_with_empty_lines():
+def test_process_file_with_empty_lines(tmp_path):
     """Test that process_file handles empty lines correctly."""
     config = {
         "source_dir": "test_source",
@@ -314,12 +353,11 @@ def test_process_file_with_empty_lines():
     # 然后移除多余的空行
     expected = processor.remove_empty_lines(standardized)
 
-    with tempfile.NamedTemporaryFile(mode='w+', suffix='.md') as temp:
-        temp.write(content)
-        temp.flush()
-        result = processor.process_file(temp.name)
-        # 由于文件末尾可以有或没有换行符，我们只需要比较内容部分
-        assert result.rstrip('\n') == expected.rstrip('\n')
+    md_file = tmp_path / "test.md"
+    md_file.write_text(content)
+    result = processor.process_file(str(md_file))
+    # 由于文件末尾可以有或没有换行符，我们只需要比较内容部分
+    assert result.rstrip('\n') == expected.rstrip('\n')
 
 
 def test_publish_without_hugo_target_home():
@@ -357,139 +395,120 @@ def test_publish_with_invalid_hugo_target_home():
     assert "HUGO_TARGET_HOME directory does not exist" in str(exc_info.value)
 
 
-def test_publish_with_valid_hugo_target_home():
+def test_publish_with_valid_hugo_target_home(tmp_path, hugo_env):
     """Test publishing succeeds with valid HUGO_TARGET_HOME and creates required directories."""
     # Arrange
-    with tempfile.TemporaryDirectory() as source_dir, \
-            tempfile.TemporaryDirectory() as hugo_home:
+    source_path = tmp_path / "src"
+    source_path.mkdir()
 
-        # Create a test markdown file
-        source_path = Path(source_dir)
-        test_file = source_path / "test.md"
-        test_file.write_text('''---
+    # Create a test markdown file
+    test_file = source_path / "test.md"
+    test_file.write_text('''---
 title="Test Article"
 date="2024-04-04"
 ---
 # Test content
 ''')
 
-        os.environ["HUGO_TARGET_HOME"] = hugo_home
-        processor = HugoProcessor({
-            'source_dir': source_dir,
-            'target_dir': str(Path(hugo_home) / "content" / "blog"),
-            'image_dir': str(Path(hugo_home) / "static" / "img" / "blog")
-        })
+    hugo_home, processor = hugo_env(source_path)
+    blog_dir = Path(hugo_home, "content", "blog")
+    img_dir = Path(hugo_home, "static", "img", "blog")
 
-        # Act
-        result = processor.publish()
-
-        # Assert
-        assert result["success"] is True
-        assert len(result["processed_files"]) == 1
-        assert str(test_file) in result["processed_files"]
-        assert len(result["errors"]) == 0
+    # Act
+    result = processor.publish()
 
-        blog_dir = Path(hugo_home) / "content" / "blog"
-        img_dir = Path(hugo_home) / "static" / "img" / "blog"
+    # Assert
+    assert result["success"] is True
+    assert len(result["processed_files"]) == 1
+    assert str(test_file) in result["processed_files"]
+    assert len(result["errors"]) == 0
 
-        assert blog_dir.exists(), "Blog directory was not created"
-        assert img_dir.exists(), "Image directory was not created"
-        assert (blog_dir / "test.md").exists(), "Markdown file was not copied"
+    assert blog_dir.exists(), "Blog directory was not created"
+    assert img_dir.exists(), "Image directory was not created"
+    assert (blog_dir / "test.md").exists(), "Markdown file was not copied"
 
 
-def test_publish_copies_markdown_files():
+def test_publish_copies_markdown_files(tmp_path, hugo_env):
     """Test that publish copies markdown files to the Hugo blog directory."""
     # Arrange
-    with tempfile.TemporaryDirectory() as source_dir, \
-            tempfile.TemporaryDirectory() as hugo_home:
-
-        # Create test markdown files
-        source_path = Path(source_dir)
-        test_files = [
-            "article1.md",
-            "subfolder/article2.md",
-            "deep/nested/article3.md"
-        ]
-
-        # Create the files with some content
-        for file_path in test_files:
-            full_path = source_path / file_path
-            full_path.parent.mkdir(parents=True, exist_ok=True)
-            full_path.write_text('''---
+    source_path = tmp_path / "src"
+    source_path.mkdir()
+
+    # Create test markdown files
+    test_files = [
+        "article1.md",
+        "subfolder/article2.md",
+        "deep/nested/article3.md"
+    ]
+
+    # Create the files with some content
+    for file_path in test_files:
+        full_path = source_path / file_path
+        full_path.parent.mkdir(parents=True, exist_ok=True)
+        full_path.write_text('''---
 title="Test Article"
 date="2024-04-04"
 ---
 # Test content
 ''')
 
-        # Set up HugoProcessor
-        os.environ["HUGO_TARGET_HOME"] = hugo_home
-        processor = HugoProcessor({
-            'source_dir': str(source_path),
-            'target_dir': '/tmp',  # Not used in this test
-            'image_dir': '/tmp'    # Not used in this test
-        })
+    # Set up HugoProcessor
+    hugo_home, processor = hugo_env(source_path)
 
-        # Act
-        result = processor.publish()
+    # Act
+    result = processor.publish()
 
-        # Assert
-        assert result["success"] is True
-        assert len(result["processed_files"]) == len(test_files)
-        assert len(result["errors"]) == 0
+    # Assert
+    assert result["success"] is True
+    assert len(result["processed_files"]) == len(test_files)
+    assert len(result["errors"]) == 0
 
-        hugo_blog_dir = Path(hugo_home) / "content" / "blog"
-        for file_path in test_files:
-            target_path = hugo_blog_dir / file_path
-            assert target_path.exists(), f"File {file_path} was not copied"
-            assert target_path.read_text() == (source_path / file_path).read_text(), \
-                f"Content mismatch for {file_path}"
+    hugo_blog_dir = Path(hugo_home, "content", "blog")
+    for file_path in test_files:
+        target_path = hugo_blog_dir / file_path
+        assert target_path.exists(), f"File {file_path} was not copied"
+        assert target_path.read_text() == (source_path / file_path).read_text(), \
+            f"Content mismatch for {file_path}"
 
 
-def test_publish_skips_non_markdown_files():
+def test_publish_skips_non_markdown_files(tmp_path, hugo_env):
     """Test that publish only copies markdown files and skips others."""
     # Arrange
-    with tempfile.TemporaryDirectory() as source_dir, \
-            tempfile.TemporaryDirectory() as hugo_home:
+    source_path = tmp_path / "src"
+    source_path.mkdir()
 
-        # Create test files
-        source_path = Path(source_dir)
-        markdown_file = source_path / "article.md"
-        text_file = source_path / "notes.txt"
-        json_file = source_path / "data.json"
+    # Create test files
+    markdown_file = source_path / "article.md"
+    text_file = source_path / "notes.txt"
+    json_file = source_path / "data.json"
 
-        # Create the files with some content
-        markdown_file.write_text("""---
+    # Create the files with some content
+    markdown_file.write_text("""---
 title="Test Article"
 date="2024-04-04"
 ---
 # Test content
 """)
-        text_file.write_text("Some notes")
-        json_file.write_text('{"key": "value"}')
-
-        # Set up HugoProcessor
-        os.environ["HUGO_TARGET_HOME"] = hugo_home
-        processor = HugoProcessor({
-            'source_dir': str(source_path),
-            'target_dir': '/tmp',
-            'image_dir': '/tmp'
-        })
+    text_file.write_text("Some notes")
+    json_file.write_text('{"key": "value"}')
 
-        # Act
-        processor.publish()
+    # Set up HugoProcessor
+    hugo_home, processor = hugo_env(source_path)
 
-        # Assert
-        hugo_blog_dir = Path(hugo_home) / "content" / "blog"
-        assert (hugo_blog_dir /
-                "article.md").exists(), "Markdown file was not copied"
-        assert not (hugo_blog_dir /
-                    "notes.txt").exists(), "Text file was copied"
-        assert not (hugo_blog_dir /
-                    "data.json").exists(), "JSON file was copied"
+    # Act
+    processor.publish()
+
+    # Assert
+    hugo_blog_dir = Path(hugo_home, "content", "blog")
+    assert (hugo_blog_dir /
+            "article.md").exists(), "Markdown file was not copied"
+    assert not (hugo_blog_dir /
+                "notes.txt").exists(), "Text file was copied"
+    assert not (hugo_blog_dir /
+                "data.json").exists(), "JSON file was copied"
 
 
-def test_copy_image_files_basic(tmp_path):
+def test_copy_image_files_basic(tmp_path, hugo_env):
     """Test basic image file copying functionality."""
     # Setup test environment
     source_dir = tmp_path / "source"
@@ -499,7 +518,7 @@ def test_copy_image_files_basic(tmp_path):
 
     # Create test image
     test_img = img_dir / "test.jpg"
-    test_img.write_bytes(b"fake image content")
+    test_img.write_bytes(SAMPLE_IMG)
 
     # Create markdown file with image reference
     md_content = "![Test Image](images/test.jpg)"
@@ -507,28 +526,20 @@ def test_copy_image_files_basic(tmp_path):
     md_file.write_text(md_content)
 
     # Setup Hugo processor
-    hugo_home = tmp_path / "hugo"
-    hugo_home.mkdir()
-    os.environ["HUGO_TARGET_HOME"] = str(hugo_home)
-
-    config = {
-        'source_dir': str(source_dir),
-        'target_dir': str(hugo_home / "content" / "blog"),
-        'image_dir': str(hugo_home / "static" / "img" / "blog")
-    }
-    processor = HugoProcessor(config)
+    hugo_home, processor = hugo_env(source_dir)
+    hugo_img_dir = Path(hugo_home, "static", "img", "blog")
 
     # Act
     image_mapping = processor.copy_image_files(md_file)
 
     # Assert
-    expected_img_path = hugo_home / "static" / "img" / "blog" / "test.jpg"
+    expected_img_path = hugo_img_dir / "test.jpg"
     assert expected_img_path.exists()
     assert image_mapping == {"images/test.jpg": "/img/blog/test.jpg"}
-    assert expected_img_path.read_bytes() == b"fake image content"
+    assert expected_img_path.read_bytes() == SAMPLE_IMG
 
 
-def test_copy_image_files_nested_structure(tmp_path):
+def test_copy_image_files_nested_structure(tmp_path, hugo_env):
     """Test copying images while maintaining directory structure."""
     # Setup test environment
     source_dir = tmp_path / "source"
@@ -538,7 +549,7 @@ def test_copy_image_files_nested_structure(tmp_path):
 
     # Create test image in nested directory
     test_img = nested_dir / "test.jpg"
-    test_img.write_bytes(b"nested image content")
+    test_img.write_bytes(NESTED_IMG)
 
     # Create markdown file with image reference
     md_content = "![Nested Image](images/test.jpg)"
@@ -547,28 +558,20 @@ def test_copy_image_files_nested_structure(tmp_path):
     md_file.write_text(md_content)
 
     # Setup Hugo processor
-    hugo_home = tmp_path / "hugo"
-    hugo_home.mkdir()
-    os.environ["HUGO_TARGET_HOME"] = str(hugo_home)
-
-    config = {
-        'source_dir': str(source_dir),
-        'target_dir': str(hugo_home / "content" / "blog"),
-        'image_dir': str(hugo_home / "static" / "img" / "blog")
-    }
-    processor = HugoProcessor(config)
+    hugo_home, processor = hugo_env(source_dir)
+    hugo_img_dir = Path(hugo_home, "static", "img", "blog")
 
     # Act
     image_mapping = processor.copy_image_files(md_file)
 
     # Assert
-    expected_img_path = hugo_home / "static" / "img" / "blog" / "posts" / "test.jpg"
+    expected_img_path = hugo_img_dir / "posts" / "test.jpg"
     assert expected_img_path.exists()
     assert image_mapping == {"images/test.jpg": "/img/blog/posts/test.jpg"}
-    assert expected_img_path.read_bytes() == b"nested image content"
+    assert expected_img_path.read_bytes() == NESTED_IMG
 
 
-def test_copy_image_files_name_conflict(tmp_path):
+def test_copy_image_files_name_conflict(tmp_path, hugo_env):
     """Test handling of image file name conflicts."""
     # Setup test environment
     source_dir = tmp_path / "source"
@@ -582,8 +585,8 @@ def test_copy_image_files_name_conflict(tmp_path):
 
     test_img1 = img_dir1 / "test.jpg"
     test_img2 = img_dir2 / "test.jpg"
-    test_img1.write_bytes(b"image content 1")
-    test_img2.write_bytes(b"image content 2")
+    test_img1.write_bytes(CONFLICT_IMG_1)
+    test_img2.write_bytes(CONFLICT_IMG_2)
 
     # Create markdown files referencing the images
     md_file1 = source_dir / "post1" / "article1.md"
@@ -592,166 +595,114 @@ def test_copy_image_files_name_conflict(tmp_path):
     md_file2.write_text("![Test Image](images/test.jpg)")
 
     # Setup Hugo processor
-    hugo_home = tmp_path / "hugo"
-    hugo_home.mkdir()
-    os.environ["HUGO_TARGET_HOME"] = str(hugo_home)
-
-    config = {
-        'source_dir': str(source_dir),
-        'target_dir': str(hugo_home / "content" / "blog"),
-        'image_dir': str(hugo_home / "static" / "img" / "blog")
-    }
-    processor = HugoProcessor(config)
+    hugo_home, processor = hugo_env(source_dir)
+    hugo_img_dir = Path(hugo_home, "static", "img", "blog")
 
     # Act
     image_mapping1 = processor.copy_image_files(md_file1)
     image_mapping2 = processor.copy_image_files(md_file2)
 
     # Assert
-    img_dir = hugo_home / "static" / "img" / "blog"
-    assert (img_dir / "post1" / "test.jpg").exists()
-    assert (img_dir / "post2" / "test.jpg").exists()
+    assert (hugo_img_dir / "post1" / "test.jpg").exists()
+    assert (hugo_img_dir / "post2" / "test.jpg").exists()
 
     # Verify the content of both images was preserved
-    img1_path = img_dir / "post1" / "test.jpg"
-    img2_path = img_dir / "post2" / "test.jpg"
-    assert img1_path.read_bytes() == b"image content 1"
-    assert img2_path.read_bytes() == b"image content 2"
+    img1_path = hugo_img_dir / "post1" / "test.jpg"
+    img2_path = hugo_img_dir / "post2" / "test.jpg"
+    assert img1_path.read_bytes() == CONFLICT_IMG_1
+    assert img2_path.read_bytes() == CONFLICT_IMG_2
 
     # Verify the mappings
     assert image_mapping1 == {"images/test.jpg": "/img/blog/post1/test.jpg"}
     assert image_mapping2 == {"images/test.jpg": "/img/blog/post2/test.jpg"}
 
 
-def test_update_image_references_basic(tmp_path):
-    """Test basic image reference updating functionality."""
-    # Setup
-    content = """# Test Document
+MD_CONTENT = """# Test Document
 ![Test Image](images/test.jpg)
 Some text here
 ![Another Image](path/to/image.png)
 """
-    path_mapping = {
-        "images/test.jpg": "/img/blog/test.jpg",
-        "path/to/image.png": "/img/blog/images/image.png"
-    }
-
-    # Create processor
-    processor = HugoProcessor({
-        'source_dir': str(tmp_path),
-        'target_dir': str(tmp_path / "target"),
-        'image_dir': str(tmp_path / "images")
-    })
-
-    # Act
-    updated_content = processor.update_image_references(content, path_mapping)
-
-    # Assert
-    expected = """# Test Document
+MD_MAP = {
+    "images/test.jpg": "/img/blog/test.jpg",
+    "path/to/image.png": "/img/blog/images/image.png"
+}
+MD_EXP = """# Test Document
 ![Test Image](/img/blog/test.jpg)
 Some text here
 ![Another Image](/img/blog/images/image.png)
 """
-    assert updated_content == expected
 
-
-def test_update_image_references_with_html(tmp_path):
-    """Test updating HTML image references."""
-    # Setup
-    content = """# Test Document
+HTML_CONTENT = """# Test Document
 <img src="images/test.jpg" alt="Test Image">
 Some text here
 <img src='path/to/image.png' alt='Another Image' class="large">
 """
-    path_mapping = {
-        "images/test.jpg": "/img/blog/test.jpg",
-        "path/to/image.png": "/img/blog/images/image.png"
-    }
-
-    # Create processor
-    processor = HugoProcessor({
-        'source_dir': str(tmp_path),
-        'target_dir': str(tmp_path / "target"),
-        'image_dir': str(tmp_path / "images")
-    })
-
-    # Act
-    updated_content = processor.update_image_references(content, path_mapping)
-
-    # Assert
-    expected = """# Test Document
+HTML_MAP = {
+    "images/test.jpg": "/img/blog/test.jpg",
+    "path/to/image.png": "/img/blog/images/image.png"
+}
+HTML_EXP = """# Test Document
 <img src="/img/blog/test.jpg" alt="Test Image">
 Some text here
 <img src='/img/blog/images/image.png' alt='Another Image' class="large">
 """
-    assert updated_content == expected
-
 
-def test_update_image_references_mixed_format(tmp_path):
-    """Test updating both Markdown and HTML image references."""
-    # Setup
-    content = """# Test Document
+MIX_CONTENT = """# Test Document
 ![Test Image](images/test.jpg)
 Some text here
 <img src="path/to/image.png" alt="Another Image">
 More text
 ![Third Image](images/third.gif)
 """
-    path_mapping = {
-        "images/test.jpg": "/img/blog/test.jpg",
-        "path/to/image.png": "/img/blog/images/image.png",
-        "images/third.gif": "/img/blog/third.gif"
-    }
-
-    # Create processor
-    processor = HugoProcessor({
-        'source_dir': str(tmp_path),
-        'target_dir': str(tmp_path / "target"),
-        'image_dir': str(tmp_path / "images")
-    })
-
-    # Act
-    updated_content = processor.update_image_references(content, path_mapping)
-
-    # Assert
-    expected = """# Test Document
+MIX_MAP = {
+    "images/test.jpg": "/img/blog/test.jpg",
+    "path/to/image.png": "/img/blog/images/image.png",
+    "images/third.gif": "/img/blog/third.gif"
+}
+MIX_EXP = """# Test Document
 ![Test Image](/img/blog/test.jpg)
 Some text here
 <img src="/img/blog/images/image.png" alt="Another Image">
 More text
 ![Third Image](/img/blog/third.gif)
 """
-    assert updated_content == expected
-
 
-def test_update_image_references_preserves_unmapped(tmp_path):
-    """Test that unmapped image references are preserved as-is."""
-    # Setup
-    content = """# Test Document
+# 未在映射表中的图片引用应保持原样
+UNMAP_CONTENT = """# Test Document
 ![Test Image](images/test.jpg)
 ![Unmapped Image](images/unmapped.jpg)
 <img src="path/to/unmapped.png" alt="Another Unmapped">
 """
-    path_mapping = {
-        "images/test.jpg": "/img/blog/test.jpg"
-    }
+UNMAP_MAP = {
+    "images/test.jpg": "/img/blog/test.jpg"
+}
+UNMAP_EXP = """# Test Document
+![Test Image](/img/blog/test.jpg)
+![Unmapped Image](images/unmapped.jpg)
+<img src="path/to/unmapped.png" alt="Another Unmapped">
+"""
 
-    # Create processor
-    processor = HugoProcessor({
+
+@pytest.fixture
+def image_ref_processor(tmp_path):
+    """HugoProcessor used by the image reference update tests."""
+    return HugoProcessor({
         'source_dir': str(tmp_path),
         'target_dir': str(tmp_path / "target"),
         'image_dir': str(tmp_path / "images")
     })
 
-    # Act
-    updated_content = processor.update_image_references(content, path_mapping)
 
-    # Assert
-    expected = """# Test Document
-![Test Image](/img/blog/test.jpg)
-![Unmapped Image](images/unmapped.jpg)
-<img src="path/to/unmapped.png" alt="Another Unmapped">
-"""
+@pytest.mark.parametrize("content,mapping,expected", [
+    (MD_CONTENT, MD_MAP, MD_EXP),
+    (HTML_CONTENT, HTML_MAP, HTML_EXP),
+    (MIX_CONTENT, MIX_MAP, MIX_EXP),
+    (UNMAP_CONTENT, UNMAP_MAP, UNMAP_EXP),
+], ids=["md", "html", "mixed", "unmapped"])
+def test_update_image_references(image_ref_processor, content, mapping, expected):
+    """Test updating Markdown and HTML image references from a path mapping."""
+    updated_content = image_ref_processor.update_image_references(
+        content, mapping)
     assert updated_content == expected
 
 
@@ -778,52 +729,40 @@ def test_publish_with_unwritable_hugo_target_home(tmp_path):
     os.chmod(hugo_home, 0o755)  # Restore permissions for cleanup
 
 
-def test_publish_creates_required_directories():
+def test_publish_creates_required_directories(hugo_env):
     """Test that publish creates required Hugo directories if they don't exist."""
     # Arrange
-    with tempfile.TemporaryDirectory() as hugo_home:
-        os.environ["HUGO_TARGET_HOME"] = hugo_home
-        processor = HugoProcessor({
-            'source_dir': '/path/to/source',
-            'target_dir': '/path/to/target',
-            'image_dir': '/path/to/images'
-        })
+    hugo_home, processor = hugo_env('/path/to/source')
 
-        # Act
-        processor.validate_hugo_environment()  # Should not raise any exceptions
+    # Act
+    processor.validate_hugo_environment()  # Should not raise any exceptions
 
-        # Assert
-        blog_dir = Path(hugo_home) / "content" / "blog"
-        img_dir = Path(hugo_home) / "static" / "img" / "blog"
+    # Assert
+    blog_dir = Path(hugo_home, "content", "blog")
+    img_dir = Path(hugo_home, "static", "img", "blog")
 
-        assert blog_dir.exists(), "Blog directory was not created"
-        assert img_dir.exists(), "Image directory was not created"
+    assert blog_dir.exists(), "Blog directory was not created"
+    assert img_dir.exists(), "Image directory was not created"
 
 
-def test_publish_with_partial_directory_structure():
+def test_publish_with_partial_directory_structure(hugo_env):
     """Test publishing with partially existing Hugo directory structure."""
     # Arrange
-    with tempfile.TemporaryDirectory() as hugo_home:
-        # Create only the content directory
-        content_dir = Path(hugo_home) / "content"
-        content_dir.mkdir()
-
-        os.environ["HUGO_TARGET_HOME"] = hugo_home
-        processor = HugoProcessor({
-            'source_dir': '/path/to/source',
-            'target_dir': '/path/to/target',
-            'image_dir': '/path/to/images'
-        })
+    hugo_home, processor = hugo_env('/path/to/source')
 
-        # Act
-        processor.validate_hugo_environment()  # Should not raise any exceptions
+    # Create only the content directory
+    content_dir = hugo_home / "content"
+    content_dir.mkdir()
 
-        # Assert
-        blog_dir = Path(hugo_home) / "content" / "blog"
-        img_dir = Path(hugo_home) / "static" / "img" / "blog"
+    # Act
+    processor.validate_hugo_environment()  # Should not raise any exceptions
+
+    # Assert
+    blog_dir = Path(hugo_home, "content", "blog")
+    img_dir = Path(hugo_home, "static", "img", "blog")
 
-        assert blog_dir.exists(), "Blog directory was not created"
-        assert img_dir.exists(), "Image directory was not created"
+    assert blog_dir.exists(), "Blog directory was not created"
+    assert img_dir.exists(), "Image directory was not created"
 
 
 def test_validate_hugo_environment_raises_error_when_not_set():
@@ -845,7 +784,20 @@ def test_validate_hugo_environment_raises_error_when_not_set():
         exc_info.value)
 
 
-def test_copy_article_images(tmp_path):
+# copy_article_images 只关心图片引用，直接写入字节，省去文本编码
+ARTICLE_MD_BYTES = b"\n".join([
+    b"+++",
+    b'title="Test Article"',
+    b"+++",
+    b"# Test Article",
+    b"",
+    b"![Test Image 1](images/test1.jpg)",
+    b"![Test Image 2](images/test2.png)",
+    b"",
+])
+
+
+def test_copy_article_images(tmp_path, hugo_env):
     """Test copying article images to Hugo static directory.
 
     This test verifies:
@@ -860,52 +812,30 @@ def test_copy_article_images(tmp_path):
     images_dir.mkdir()
 
     # Create test images
-    test_image1 = images_dir / "test1.jpg"
-    test_image1.write_bytes(b"test1 content")
-    test_image2 = images_dir / "test2.png"
-    test_image2.write_bytes(b"test2 content")
+    expected_images = {"test1.jpg": TEST1_IMG, "test2.png": TEST2_IMG}
+    for name, data in expected_images.items():
+        (images_dir / name).write_bytes(data)
 
     # Create test markdown file with image references
-    md_content = """+++
-title="Test Article"
-+++
-# Test Article
-
-![Test Image 1](images/test1.jpg)
-![Test Image 2](images/test2.png)
-"""
     md_file = source_dir / "test.md"
-    md_file.write_text(md_content)
-
-    # Set up Hugo target directory
-    hugo_home = tmp_path / "hugo"
-    hugo_home.mkdir()
-    os.environ["HUGO_TARGET_HOME"] = str(hugo_home)
+    md_file.write_bytes(ARTICLE_MD_BYTES)
 
-    # Initialize HugoProcessor
-    processor = HugoProcessor({
-        'source_dir': str(source_dir),
-        'target_dir': str(hugo_home / "content" / "blog"),
-        'image_dir': str(hugo_home / "static" / "img" / "blog")
-    })
+    # Set up Hugo target directory and processor
+    hugo_home, processor = hugo_env(source_dir)
+    img_target_dir = Path(hugo_home, "static", "img", "blog")
 
     # Create a file to be overwritten
-    img_target_dir = hugo_home / "static" / "img" / "blog"
     img_target_dir.mkdir(parents=True)
     existing_image = img_target_dir / "test1.jpg"
-    existing_image.write_bytes(b"old content")
+    existing_image.write_bytes(OLD_IMG)
 
     # Test image copying
     processor.copy_article_images(str(md_file))
 
-    # Verify images were copied correctly
-    copied_image1 = img_target_dir / "test1.jpg"
-    copied_image2 = img_target_dir / "test2.png"
-
-    assert copied_image1.exists(), "First image should be copied"
-    assert copied_image2.exists(), "Second image should be copied"
-    assert copied_image1.read_bytes() == b"test1 content", "First image should be overwritten"
-    assert copied_image2.read_bytes() == b"test2 content", "Second image content should match"
+    # Verify images were copied correctly and the old file was overwritten
+    copied = {name: (img_target_dir / name).read_bytes()
+              for name in expected_images}
+    assert copied == expected_images
 
 
 def test_publish_result_notification(tmp_path):
@@ -915,8 +845,10 @@ def test_publish_result_notification(tmp_path):
     source_dir.mkdir()
     target_dir = tmp_path / "hugo_target"
     target_dir.mkdir()
-    (target_dir / "content" / "blog").mkdir(parents=True)
-    (target_dir / "static" / "img" / "blog").mkdir(parents=True)
+    blog_dir = Path(target_dir, "content", "blog")
+    img_dir = Path(target_dir, "static", "img", "blog")
+    blog_dir.mkdir(parents=True)
+    img_dir.mkdir(parents=True)
 
     # 创建测试文件
     md_content = """---
@@ -934,18 +866,18 @@ description="Test Description"
     # 创建图片目录和测试图片
     image_dir = source_dir / "images"
     image_dir.mkdir()
-    (image_dir / "test1.jpg").write_bytes(b"fake jpg")
-    (image_dir / "test2.png").write_bytes(b"fake png")
+    (image_dir / "test1.jpg").write_bytes(FAKE_JPG)
+    (image_dir / "test2.png").write_bytes(FAKE_PNG)
 
     # 预先创建一些文件来测试覆盖情况
-    (target_dir / "content" / "blog" / "test.md").write_text("old content")
-    (target_dir / "static" / "img" / "blog" / "test1.jpg").write_bytes(b"old jpg")
+    (blog_dir / "test.md").write_text("old content")
+    (img_dir / "test1.jpg").write_bytes(OLD_JPG)
 
     # 设置环境变量和配置
     config = {
         'source_dir': str(source_dir),
-        'target_dir': str(target_dir / "content" / "blog"),
-        'image_dir': str(target_dir / "static" / "img" / "blog")
+        'target_dir': str(blog_dir),
+        'image_dir': str(img_dir)
     }
 
     with patch.dict(os.environ, {'HUGO_TARGET_HOME': str(target_dir)}):
@@ -989,8 +921,10 @@ def test_publish_result_notification_with_errors(tmp_path):
     source_dir.mkdir()
     target_dir = tmp_path / "hugo_target"
     target_dir.mkdir()
-    (target_dir / "content" / "blog").mkdir(parents=True)
-    (target_dir / "static" / "img" / "blog").mkdir(parents=True)
+    blog_dir = Path(target_dir, "content", "blog")
+    img_dir = Path(target_dir, "static", "img", "blog")
+    blog_dir.mkdir(parents=True)
+    img_dir.mkdir(parents=True)
 
     # 创建测试文件，引用不存在的图片
     md_content = """---
@@ -1007,8 +941,8 @@ description="Test Description"
     # 设置环境变量和配置
     config = {
         'source_dir': str(source_dir),
-        'target_dir': str(target_dir / "content" / "blog"),
-        'image_dir': str(target_dir / "static" / "img" / "blog")
+        'target_dir': str(blog_dir),
+        'image_dir': str(img_dir)
     }
 
     with patch.dict(os.environ, {'HUGO_TARGET_HOME': str(target_dir)}):
@@ -1053,8 +987,10 @@ def test_publish_skips_invalid_documents(tmp_path, monkeypatch):
     image_dir.mkdir(parents=True)
     hugo_dir = tmp_path / "hugo"
     hugo_dir.mkdir()
-    (hugo_dir / "content" / "blog").mkdir(parents=True)
-    (hugo_dir / "static" / "img" / "blog").mkdir(parents=True)
+    blog_dir = Path(hugo_dir, "content", "blog")
+    img_dir = Path(hugo_dir, "static", "img", "blog")
+    blog_dir.mkdir(parents=True)
+    img_dir.mkdir(parents=True)
 
     # 设置 HUGO_TARGET_HOME 环境变量
     monkeypatch.setenv("HUGO_TARGET_HOME", str(hugo_dir))
@@ -1091,8 +1027,8 @@ This article has a missing image:
     # 初始化 HugoProcessor
     config = {
         'source_dir': str(source_dir),
-        'target_dir': str(hugo_dir / "content" / "blog"),
-        'image_dir': str(hugo_dir / "static" / "img" / "blog")
+        'target_dir': str(blog_dir),
+        'image_dir': str(img_dir)
     }
     processor = HugoProcessor(config)
 
@@ -43,6 +43,13 @@ def test_validate_image_reference_invalid_url():
     assert "Invalid image URL" in str(exc_info.value)
 
 
+def test_validate_image_reference_invalid_ftp_url():
+    """Test validation of ftp image reference without a host."""
+    with pytest.raises(InvalidImageReferenceError) as exc_info:
+        validate_image_reference("ftp:///image.jpg")
+    assert "Invalid image URL" in str(exc_info.value)
+
+
 def test_download_network_image_connection_error(tmp_path):
     """Test handling of network connection error during image download."""
     with pytest.raises(NetworkImageError) as exc_info:
@@ -131,6 +138,19 @@ def test_download_network_image_gif(tmp_path, requests_mock):
     assert result.exists()
 
 
+def test_download_network_image_content_type_with_parameters(tmp_path, requests_mock):
+    """Test that content type parameters do not hide the image type."""
+    requests_mock.get(
+        "http://example.com/picture",
+        content=b"fake-png-content",
+        headers={"content-type": "image/PNG; charset=binary"}
+    )
+
+    result = download_network_image("http://example.com/picture", tmp_path)
+    assert result.suffix == ".png"
+    assert result.exists()
+
+
 def test_download_network_image_unknown_type_with_extension(tmp_path, requests_mock):
     """Test download with unknown content type but valid URL extension."""
     requests_mock.get(
@@ -19,6 +19,15 @@ def image_processor(mock_wx_client, temp_test_dir):
     return ImageProcessor(mock_wx_client, WxCache(str(temp_test_dir)))
 
 
+def link_or_copy(src, dst_dir):
+    """测试只读取这些文件，优先用硬链接代替复制，跨设备等情况再回退到复制"""
+    dst = os.path.join(dst_dir, os.path.basename(src))
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
 @pytest.fixture
 def temp_test_dir(tmp_path):
     """创建临时测试目录并复制测试数据"""
@@ -26,18 +35,18 @@ def temp_test_dir(tmp_path):
     data_dir = os.path.join(os.getcwd(), "testdata")
     if os.path.exists(data_dir):
         # 复制 a_template.md
-        shutil.copy2(os.path.join(data_dir, "a_template.md"), tmp_path)
+        link_or_copy(os.path.join(data_dir, "a_template.md"), tmp_path)
 
         # 创建 assets 目录并复制图片
         assets_dir = os.path.join(tmp_path, "assets")
         os.makedirs(assets_dir, exist_ok=True)
-        shutil.copy2(os.path.join(data_dir, "assets", "exists.png"), assets_dir)
+        link_or_copy(os.path.join(data_dir, "assets", "exists.png"), assets_dir)
 
         # 创建 banner 目录并复制 banner.png
         banner_dir = os.path.join(assets_dir, "banner")
         os.makedirs(banner_dir, exist_ok=True)
         if os.path.exists(os.path.join(data_dir, "assets", "banner", "banner.png")):
-            shutil.copy2(
+            link_or_copy(
                 os.path.join(data_dir, "assets", "banner", "banner.png"), banner_dir
             )
     else:
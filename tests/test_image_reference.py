@@ -119,3 +119,19 @@ def test_extract_invalid_image_references():
 """
     references = extract_image_references(content)
     assert len(references) == 0
+
+
+def test_extract_references_keep_document_order():
+    """Test that repeated references are returned in the order they appear."""
+    content = """
+<img src="same.jpg">
+
+![Between](between.jpg)
+
+<img src="same.jpg">
+"""
+    references = extract_image_references(content)
+
+    assert [ref.path for ref in references] == [
+        "same.jpg", "between.jpg", "same.jpg"]
+    assert [ref.is_html for ref in references] == [True, False, True]
@@ -1,31 +1,26 @@
+import copy
 import shutil
-import tempfile
+import threading
+import time
 import pytest
 import os
+from pathlib import Path
+import requests
 from wx.md_file import MarkdownHeader, MarkdownFile, MarkdownBody, ImageReference
+from wx.error_handler import ImageError
 
 
-@pytest.fixture
-def temp_dir():
-    """Create a temporary directory for test files"""
-    dir_path = tempfile.mkdtemp()
-    yield dir_path
-    shutil.rmtree(dir_path)
-
-
-@pytest.fixture
-def test_data_dir(temp_dir):
-    """Setup test data directory with necessary files"""
-    # Copy test data to temp directory
+def _build_testdata_master(master):
+    """Copy testdata into master and add the placeholder images"""
     data_dir = os.path.join(os.getcwd(), "testdata")
     if os.path.exists(data_dir):
-        shutil.copytree(data_dir, temp_dir, dirs_exist_ok=True)
+        shutil.copytree(data_dir, master, dirs_exist_ok=True)
     else:
         print("项目根目录中 testdata 目录不存在")
 
     # Create necessary directories and files
-    assets_dir = os.path.join(temp_dir, "assets")
-    banner_dir = os.path.join(temp_dir, "banner")
+    assets_dir = os.path.join(master, "assets")
+    banner_dir = os.path.join(master, "banner")
     os.makedirs(assets_dir, exist_ok=True)
     os.makedirs(banner_dir, exist_ok=True)
 
@@ -35,16 +30,76 @@ def test_data_dir(temp_dir):
     with open(os.path.join(banner_dir, "banner.png"), "w") as f:
         f.write("placeholder")
 
-    return temp_dir
 
+@pytest.fixture(scope="session")
+def _testdata_master(tmp_path_factory):
+    """Copy testdata once per session (once per run under pytest-xdist)"""
+    if not os.environ.get("PYTEST_XDIST_WORKER"):
+        master = str(tmp_path_factory.mktemp("master"))
+        _build_testdata_master(master)
+        return master
+
+    # xdist workers share the run's base temp dir; the first one to take
+    # the lock builds the master copy and the others reuse it
+    import fcntl
+
+    shared = tmp_path_factory.getbasetemp().parent
+    master = str(shared / "testdata_master")
+    with open(str(shared / "testdata_master.lock"), "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        if not os.path.exists(master):
+            building = master + ".partial"
+            shutil.rmtree(building, ignore_errors=True)
+            _build_testdata_master(building)
+            os.rename(building, master)
+    return master
+
+
+@pytest.fixture(scope="session")
+def template_text(_testdata_master):
+    """Content of a_template.md, read once per session"""
+    return (Path(_testdata_master) / "a_template.md").read_text(encoding="utf-8")
+
+
+def _link_tree(src_dir, dst_dir):
+    """Mirror src_dir into dst_dir with hard links, copying if linking fails"""
+    os.makedirs(dst_dir, exist_ok=True)
+    with os.scandir(src_dir) as it:
+        for entry in it:
+            dst = os.path.join(dst_dir, entry.name)
+            if entry.is_dir():
+                _link_tree(entry.path, dst)
+                continue
+            try:
+                os.link(entry.path, dst)
+            except OSError:
+                shutil.copy2(entry.path, dst)
 
-def test_markdown_file_extract(test_data_dir):
-    """Test the static extract method of MarkdownFile class"""
-    source_dir = test_data_dir
-    abs_path = os.path.abspath(os.path.join(source_dir, "a_template.md"))
 
-    # Extract markdown file
-    md_file = MarkdownFile.extract(source_dir, abs_path)
+@pytest.fixture
+def test_data_dir(_testdata_master, tmp_path):
+    """Setup test data directory with necessary files"""
+    # Tests only add new files, so the shared files can be hard-linked
+    _link_tree(_testdata_master, str(tmp_path))
+    return str(tmp_path)
+
+
+@pytest.fixture(scope="session")
+def _parsed_template(_testdata_master):
+    """Parse a_template.md once per session"""
+    return MarkdownFile.extract(
+        _testdata_master, os.path.join(_testdata_master, "a_template.md"))
+
+
+@pytest.fixture
+def md_file(_parsed_template):
+    """A private copy of the parsed template for tests that only read it"""
+    return copy.deepcopy(_parsed_template)
+
+
+def test_markdown_file_extract(md_file):
+    """Test the static extract method of MarkdownFile class"""
+    source_dir = md_file.source_dir
 
     # Verify the extracted file
     assert isinstance(md_file, MarkdownFile)
@@ -74,14 +129,10 @@ def test_markdown_file_extract(test_data_dir):
     assert len(imgList) == 4  # banner.png, web image, exists.png, unexists.png
 
 
-def test_markdown_header_extract(test_data_dir):
+def test_markdown_header_extract(test_data_dir, template_text):
     """Test the MarkdownHeader.extract method"""
-    # Read the markdown file content
-    with open(os.path.join(test_data_dir, "a_template.md"), "r", encoding="utf-8") as f:
-        content = f.read()
-
     # Extract header content
-    header_content = content.split("+++")[1].strip()
+    header_content, _ = MarkdownFile.split_header_and_body(template_text)
     header = MarkdownHeader.extract_header(test_data_dir, header_content)
 
     # Verify header fields
@@ -93,14 +144,10 @@ def test_markdown_header_extract(test_data_dir):
     assert header.source_dir == test_data_dir
 
 
-def test_markdown_body_image_refs(test_data_dir):
+def test_markdown_body_image_refs(test_data_dir, template_text):
     """Test the MarkdownBody image reference extraction"""
-    # Read the markdown file content
-    with open(os.path.join(test_data_dir, "a_template.md"), "r", encoding="utf-8") as f:
-        content = f.read()
-
     # Extract body content
-    body_content = content.split("+++")[2].strip()
+    _, body_content = MarkdownFile.split_header_and_body(template_text)
     body = MarkdownBody(test_data_dir, body_content)
 
     # Get image references
@@ -108,6 +155,7 @@ def test_markdown_body_image_refs(test_data_dir):
 
     # Verify image references
     assert len(img_refs) == 3  # web image, exists.png, unexists.png
+    by_url = {ref.url_in_text: ref for ref in img_refs}
 
     # Verify web image
     web_img = next(ref for ref in img_refs if ref.external)
@@ -116,9 +164,7 @@ def test_markdown_body_image_refs(test_data_dir):
     assert web_img.existed == False
 
     # Verify existing local image
-    local_img = next(
-        ref for ref in img_refs if ref.url_in_text == "./assets/exists.png"
-    )
+    local_img = by_url["./assets/exists.png"]
     assert local_img.external == False
     assert local_img.existed == True
     assert local_img.original_path == os.path.abspath(
@@ -126,8 +172,7 @@ def test_markdown_body_image_refs(test_data_dir):
     )
 
     # Verify non-existing local image
-    missing_img = next(
-        ref for ref in img_refs if ref.url_in_text == "./unexists.png")
+    missing_img = by_url["./unexists.png"]
     assert missing_img.external == False
     assert missing_img.existed == False
     assert missing_img.original_path == os.path.abspath(
@@ -135,8 +180,84 @@ def test_markdown_body_image_refs(test_data_dir):
     )
 
 
-def test_markdown_file_download_images(test_data_dir):
+def test_markdown_body_lists_image_dir_once(tmp_path, monkeypatch):
+    """Many images in one directory are checked with a single scandir"""
+    assets = tmp_path / "assets"
+    assets.mkdir()
+    for i in range(5):
+        (assets / f"{i}.png").touch()
+    body_text = "".join(f"![{i}](./assets/{i}.png)\n" for i in range(6))
+    scanned = []
+    real_scandir = os.scandir
+
+    def counting_scandir(path):
+        scanned.append(path)
+        return real_scandir(path)
+
+    monkeypatch.setattr(os, "scandir", counting_scandir)
+    body = MarkdownBody(str(tmp_path), body_text)
+
+    assert [ref.existed for ref in body.get_imgRefs()] == [True] * 5 + [False]
+    assert scanned == [str(assets)]
+
+
+def test_markdown_body_without_images_scanned_once(tmp_path):
+    """A body with no images is not rescanned on every get_imgRefs call"""
+    body = MarkdownBody(str(tmp_path), "plain text, no images")
+    first = body.get_imgRefs()
+
+    assert first == []
+    assert body.get_imgRefs() is first
+
+
+def test_markdown_body_external_detection_needs_scheme(tmp_path):
+    """Only real URL schemes (any case) mark an image as external"""
+    body = MarkdownBody(
+        str(tmp_path),
+        "![a](HTTPS://example.com/a.png)\n![b](http_diagram.png)")
+
+    refs = body.get_imgRefs()
+
+    assert [ref.external for ref in refs] == [True, False]
+
+
+def test_markdown_body_non_http_refs_are_not_external(tmp_path, monkeypatch):
+    """Only http(s) images are external; // and data: refs are never downloaded"""
+    monkeypatch.setattr(
+        "wx.md_file.path_exists",
+        lambda path: pytest.fail(f"unexpected stat of {path}"))
+    body = MarkdownBody(
+        str(tmp_path),
+        "![a](//cdn.example.com/a.png)\n![b](data:image/png;base64,AAAA)")
+
+    refs = body.get_imgRefs()
+
+    assert [ref.external for ref in refs] == [False, False]
+    assert [ref.existed for ref in refs] == [False, False]
+
+
+def test_download_skips_protocol_relative_and_data_images(tmp_path, mocker):
+    """download_image_from_web does not fetch // or data: images, nor fail on them"""
+    get = mocker.patch("wx.md_file.requests.Session.get")
+    (tmp_path / "refs.md").write_text(
+        '+++\ntitle = "Refs"\nbanner = "//cdn.example.com/banner.png"\n+++\n'
+        "![a](//cdn.example.com/a.png)\n"
+        "![b](data:image/png;base64,AAAA)\n",
+        encoding="utf-8")
+    md_file = MarkdownFile.extract(str(tmp_path), "refs.md")
+
+    md_file.download_image_from_web()
+
+    get.assert_not_called()
+    assert [ref.existed for ref in md_file.image_pairs] == [False, False, False]
+
+
+def test_markdown_file_download_images(test_data_dir, mocker):
     """Test the download_image_from_web method"""
+    # Serve the web image from memory instead of picsum.photos
+    get = mocker.patch("wx.md_file.requests.Session.get")
+    get.return_value.iter_content.return_value = [b"\x89PNG\r\n\x1a\n fake image"]
+
     # Extract markdown file
     md_file = MarkdownFile.extract(
         test_data_dir, os.path.join(test_data_dir, "a_template.md"))
@@ -165,12 +286,20 @@ def test_markdown_file_download_images(test_data_dir):
     assert filename.endswith((".jpg", ".png"))
 
 
-def test_find_broken_img_links(test_data_dir):
-    """Test the find_broken_img_links method to verify it correctly identifies invalid local image paths."""
-    # Extract markdown file
-    md_file = MarkdownFile.extract(
-        test_data_dir, os.path.join(test_data_dir, "a_template.md"))
+def test_image_existence_checked_once_per_local_ref(test_data_dir, mocker):
+    """Local refs are stat'ed once at parse time, never by find_broken_img_links"""
+    stat = mocker.spy(os, "stat")
+    md_file = MarkdownFile.extract(test_data_dir, "a_template.md")
+    local_refs = [ref for ref in md_file.image_pairs if not ref.external]
+    assert stat.call_count == len(local_refs)
+
+    stat.reset_mock()
+    md_file.find_broken_img_links()
+    assert stat.call_count == 0
+
 
+def test_find_broken_img_links(md_file):
+    """Test the find_broken_img_links method to verify it correctly identifies invalid local image paths."""
     # Get broken image links
     broken_links = md_file.find_broken_img_links()
 
@@ -183,7 +312,7 @@ def test_find_broken_img_links(test_data_dir):
     assert broken_link.external == False
     assert broken_link.existed == False
     assert broken_link.original_path == os.path.abspath(
-        os.path.join(test_data_dir, "unexists.png")
+        os.path.join(md_file.source_dir, "unexists.png")
     )
 
     # Verify that web images are not included in broken links
@@ -191,3 +320,120 @@ def test_find_broken_img_links(test_data_dir):
     assert len(web_images) > 0  # There should be web images
     # None should be in broken_links
     assert all(ref not in broken_links for ref in web_images)
+
+
+def test_download_image_from_web_distinct_files(tmp_path, mocker):
+    """Each web image gets its own file even when downloaded together"""
+    (tmp_path / "two.md").write_text(
+        "+++\ntitle = \"Two\"\nbanner = \"https://example.com/banner.png\"\n+++\n"
+        "![a](https://example.com/a.png)\n![b](https://example.com/b.jpg)\n",
+        encoding="utf-8")
+    get = mocker.patch("wx.md_file.requests.Session.get")
+    get.return_value.iter_content.return_value = [b"\x89PNG fake"]
+    md_file = MarkdownFile.extract(str(tmp_path), "two.md")
+    md_file.get_imgRefs()
+
+    md_file.download_image_from_web()
+
+    web_imgs = [ref for ref in md_file.image_pairs if ref.external]
+    assert get.call_count == 3
+    assert all(ref.existed for ref in web_imgs)
+    assert len({ref.original_path for ref in web_imgs}) == 3
+    assert all(os.path.exists(ref.original_path) for ref in web_imgs)
+
+
+def test_download_image_from_web_reuses_downloaded_files(tmp_path, mocker):
+    """A second download of the same URLs makes no HTTP requests"""
+    (tmp_path / "again.md").write_text(
+        "+++\ntitle = \"Again\"\nbanner = \"https://example.com/banner.png\"\n+++\n"
+        "![a](https://example.com/a.png)\n", encoding="utf-8")
+    get = mocker.patch("wx.md_file.requests.Session.get")
+    get.return_value.iter_content.return_value = [b"\x89PNG fake"]
+
+    first = MarkdownFile.extract(str(tmp_path), "again.md")
+    first.get_imgRefs()
+    first.download_image_from_web()
+    assert get.call_count == 2
+
+    second = MarkdownFile.extract(str(tmp_path), "again.md")
+    second.get_imgRefs()
+    second.download_image_from_web()
+
+    assert get.call_count == 2
+    assert [ref.original_path for ref in second.image_pairs] == [
+        ref.original_path for ref in first.image_pairs]
+    assert all(ref.existed for ref in second.image_pairs)
+
+
+def test_download_image_from_web_overlaps_requests(tmp_path, mocker):
+    """Downloads run concurrently, so K images take about one round trip"""
+    refs = "".join(f"![{i}](https://example.com/{i}.png)\n" for i in range(6))
+    (tmp_path / "many.md").write_text(
+        "+++\ntitle = \"Many\"\nbanner = \"https://example.com/banner.png\"\n+++\n"
+        + refs, encoding="utf-8")
+    lock = threading.Lock()
+    active = [0]
+    peak = [0]
+
+    def slow_chunks(chunk_size):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return [b"\x89PNG fake"]
+
+    get = mocker.patch("wx.md_file.requests.Session.get")
+    get.return_value.iter_content.side_effect = slow_chunks
+    md_file = MarkdownFile.extract(str(tmp_path), "many.md")
+    md_file.get_imgRefs()
+
+    md_file.download_image_from_web(max_workers=3)
+
+    assert get.call_count == 7
+    assert 1 < peak[0] <= 3
+
+
+def test_download_image_from_web_duplicate_url(tmp_path, mocker):
+    """An image referenced twice is downloaded once and shared by both refs"""
+    (tmp_path / "twice.md").write_text(
+        "+++\ntitle = \"Twice\"\nbanner = \"https://example.com/pic.jpg\"\n+++\n"
+        "![a](https://example.com/pic.jpg)\n"
+        "![b](https://example.com/pic.jpg)\n", encoding="utf-8")
+
+    def slow_chunks(chunk_size):
+        time.sleep(0.05)
+        return [b"\x89PNG fake"]
+
+    get = mocker.patch("wx.md_file.requests.Session.get")
+    get.return_value.iter_content.side_effect = slow_chunks
+    md_file = MarkdownFile.extract(str(tmp_path), "twice.md")
+    md_file.get_imgRefs()
+
+    md_file.download_image_from_web()
+
+    assert get.call_count == 1
+    paths = {ref.original_path for ref in md_file.image_pairs}
+    assert len(paths) == 1 and os.path.exists(paths.pop())
+    assert all(ref.existed for ref in md_file.image_pairs)
+
+
+def test_download_image_from_web_failure_leaves_no_partial_file(tmp_path, mocker):
+    """A download that breaks midway does not leave a file in assets"""
+    (tmp_path / "broken.md").write_text(
+        "+++\ntitle = \"Broken\"\n+++\n![a](https://example.com/a.png)\n",
+        encoding="utf-8")
+
+    def broken_chunks(chunk_size):
+        yield b"\x89PNG"
+        raise requests.ConnectionError("connection reset")
+
+    get = mocker.patch("wx.md_file.requests.Session.get")
+    get.return_value.iter_content.side_effect = broken_chunks
+    md_file = MarkdownFile.extract(str(tmp_path), "broken.md")
+    md_file.get_imgRefs()
+
+    with pytest.raises(ImageError):
+        md_file.download_image_from_web()
+    assert os.listdir(tmp_path / "assets") == []
@@ -0,0 +1,51 @@
+import pytest
+from wx.openrouter_cache import LLMCache
+from wx.error_handler import CacheError
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """An empty cache in a temporary database."""
+    cache = LLMCache(str(tmp_path / ".llm_cache.sqlite"))
+    yield cache
+    cache.close()
+
+
+def test_get_missing_key(cache):
+    assert cache.get(b"missing") is None
+
+
+def test_set_and_get(cache):
+    cache.set(b"key", "value")
+    assert cache.get(b"key") == "value"
+
+    cache.set(b"key", "newer")
+    assert cache.get(b"key") == "newer"
+
+
+def test_persists_across_instances(cache, tmp_path):
+    cache.set(b"key", "value")
+    reopened = LLMCache(cache.path)
+    assert reopened.get(b"key") == "value"
+    reopened.close()
+
+
+def test_expired_entry_is_ignored(cache, monkeypatch):
+    cache.set(b"key", "value")
+    cache.ttl = 60
+    assert cache.get(b"key") == "value"
+
+    monkeypatch.setattr("wx.openrouter_cache.time.time",
+                        lambda: 10 ** 12)
+    assert cache.get(b"key") is None
+
+
+def test_clear(cache):
+    cache.set(b"key", "value")
+    cache.clear()
+    assert cache.get(b"key") is None
+
+
+def test_unopenable_path(tmp_path):
+    with pytest.raises(CacheError, match="Failed to open LLM cache"):
+        LLMCache(str(tmp_path / "missing" / "cache.sqlite"))
@@ -1,57 +1,67 @@
+import json
+import threading
+import time
 import pytest
+from wx.openrouter_cache import LLMCache
 from wx.openrouter_service import OpenRouterService
+from collections import namedtuple
 from unittest.mock import MagicMock, patch
 
+# Plain records shaped like an OpenAI chat completion response
+_Message = namedtuple('_Message', ['content'])
+_Choice = namedtuple('_Choice', ['message'])
+_Response = namedtuple('_Response', ['choices'])
 
-@pytest.fixture
-def sample_article_content():
-    return """title=""
+
+def _response(content):
+    """Build a chat completion response carrying ``content``."""
+    return _Response(choices=[_Choice(message=_Message(content=content))])
+
+
+# Empty front matter shared by the sample articles below
+FRONT_MATTER = """title=""
 subtitle=""
 tags=[]
 categories=[]
 keywords=[]
 ---
-# Understanding Python's Async IO
+"""
+
+# The article most tests send through the service
+ASYNC_IO_ARTICLE = FRONT_MATTER + """# Understanding Python's Async IO
 Python's asynchronous IO system is a powerful way to handle concurrent operations.
 This article explains the core concepts and best practices for using async/await in Python.
 
 ## Key Concepts
 - Coroutines
 - Event Loop
-- Async/Await Syntax
-
-## Benefits
-1. Better performance for IO-bound operations
-2. Clean and readable code
-3. Efficient resource utilization"""
+- Async/Await Syntax"""
 
 
-@pytest.fixture
-def mock_openai_response():
-    class MockResponse:
-        def __init__(self):
-            self.choices = [
-                type('Choice', (), {
-                    'message': type('Message', (), {
-                        'content': "Understanding Async IO in Python: A Comprehensive Guide"
-                    })
-                })
-            ]
-    return MockResponse()
+@pytest.fixture(autouse=True, scope="module")
+def _openai_client():
+    """Patch OpenAI once for the whole module; no test talks to the network."""
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setenv('OPENROUTER_API_KEY', 'test_key')
+        # Keep the shared service off any on-disk completion cache
+        mp.delenv('CD20_ARTICLE_SOURCE', raising=False)
+        with patch('wx.openrouter_service.OpenAI') as mock:
+            mock_client = MagicMock()
+            mock.return_value = mock_client
+            yield mock_client
 
 
-@pytest.fixture
-def openrouter_service(monkeypatch):
-    monkeypatch.setenv('OPENROUTER_API_KEY', 'test_key')
+@pytest.fixture(scope="module")
+def service(_openai_client):
+    """One service per module, built against the mocked OpenAI client."""
     return OpenRouterService()
 
 
 @pytest.fixture
-def mock_openai():
-    with patch('wx.openrouter_service.OpenAI') as mock:
-        mock_client = MagicMock()
-        mock.return_value = mock_client
-        yield mock_client
+def mock_openai(_openai_client):
+    """The shared mocked client with call records cleared for each test."""
+    _openai_client.reset_mock()
+    return _openai_client
 
 
 def test_init_without_api_key(monkeypatch):
@@ -62,32 +72,13 @@ def test_init_without_api_key(monkeypatch):
         exc.value)
 
 
-def test_summarize_for_title(mock_openai):
+def test_summarize_for_title(mock_openai, service):
     """Test title generation with mocked OpenAI client."""
     # Setup mock response
-    mock_response = MagicMock()
-    mock_response.choices = [
-        MagicMock(message=MagicMock(content="Python异步IO编程指南"))
-    ]
-    mock_openai.chat.completions.create.return_value = mock_response
+    mock_openai.chat.completions.create.return_value = _response("Python异步IO编程指南")
 
-    # Test content
-    content = """title=""
-subtitle=""
-tags=[]
-categories=[]
-keywords=[]
----
-# Understanding Python's Async IO
-Python's asynchronous IO system is a powerful way to handle concurrent operations.
-This article explains the core concepts and best practices for using async/await in Python.
+    content = ASYNC_IO_ARTICLE
 
-## Key Concepts
-- Coroutines
-- Event Loop
-- Async/Await Syntax"""
-
-    service = OpenRouterService()
     title = service.summarize_for_title(content)
 
     # Verify the title
@@ -103,32 +94,13 @@ This article explains the core concepts and best practices for using async/await
     assert "标题生成器" in call_args['messages'][0]['content']
 
 
-def test_summarize_for_subtitle(mock_openai):
+def test_summarize_for_subtitle(mock_openai, service):
     """Test subtitle generation with mocked OpenAI client."""
     # Setup mock response
-    mock_response = MagicMock()
-    mock_response.choices = [
-        MagicMock(message=MagicMock(content="深入解析Python异步IO编程。"))
-    ]
-    mock_openai.chat.completions.create.return_value = mock_response
-
-    # Test content
-    content = """title=""
-subtitle=""
-tags=[]
-categories=[]
-keywords=[]
----
-# Understanding Python's Async IO
-Python's asynchronous IO system is a powerful way to handle concurrent operations.
-This article explains the core concepts and best practices for using async/await in Python.
+    mock_openai.chat.completions.create.return_value = _response("深入解析Python异步IO编程。")
 
-## Key Concepts
-- Coroutines
-- Event Loop
-- Async/Await Syntax"""
+    content = ASYNC_IO_ARTICLE
 
-    service = OpenRouterService()
     subtitle = service.summarize_for_subtitle(content)
 
     # Verify the subtitle
@@ -145,31 +117,14 @@ This article explains the core concepts and best practices for using async/await
     assert "副标题生成器" in call_args['messages'][0]['content']
 
 
-def test_summarize_for_subtitle_long_input(mock_openai):
+def test_summarize_for_subtitle_long_input(mock_openai, service):
     """Test subtitle generation with long input content."""
     # Setup mock response with a long subtitle
-    mock_response = MagicMock()
-    mock_response.choices = [
-        MagicMock(message=MagicMock(
-            content="这是一个非常长的副标题，它超过了五十个字符的最大允许长度限制，需要被截断。bd218f28-d23d-4b2d-8b84-528c347c7501bd218f28-d23d-4b2d-8b84-528c347c7501"))
-    ]
-    mock_openai.chat.completions.create.return_value = mock_response
+    mock_openai.chat.completions.create.return_value = _response(
+        "这是一个非常长的副标题，它超过了五十个字符的最大允许长度限制，需要被截断。bd218f28-d23d-4b2d-8b84-528c347c7501bd218f28-d23d-4b2d-8b84-528c347c7501")
 
     # Test content with multiple paragraphs
-    content = """title=""
-subtitle=""
-tags=[]
-categories=[]
-keywords=[]
----
-# Understanding Python's Async IO
-Python's asynchronous IO system is a powerful way to handle concurrent operations.
-This article explains the core concepts and best practices for using async/await in Python.
-
-## Key Concepts
-- Coroutines
-- Event Loop
-- Async/Await Syntax
+    content = ASYNC_IO_ARTICLE + """
 
 ## Benefits
 1. Better performance for IO-bound operations
@@ -182,7 +137,6 @@ This article explains the core concepts and best practices for using async/await
 - Task cancellation
 - Debugging async applications"""
 
-    service = OpenRouterService()
     subtitle = service.summarize_for_subtitle(content)
 
     # Verify the subtitle
@@ -191,38 +145,28 @@ This article explains the core concepts and best practices for using async/await
     assert subtitle.endswith("...")  # Should end with ellipsis if truncated
 
 
-def test_generate_tags(mock_openai):
+@pytest.mark.parametrize("api_content,expected_tags", [
+    ("python-async\nconcurrency\nio-operations",
+     ["python-async", "concurrency", "io-operations"]),
+    # Fewer than 3 tags: padded with generated tags
+    ("python-web", ["python-web", "tag-2", "tag-3"]),
+    # More than 3 tags: keeps the first 3
+    ("python-web\nweb-dev\nbackend\ndjango\nflask",
+     ["python-web", "web-dev", "backend"]),
+], ids=["exact", "insufficient", "excess"])
+def test_generate_tags(mock_openai, service, api_content, expected_tags):
     """Test tag generation with mocked OpenAI client."""
     # Setup mock response
-    mock_response = MagicMock()
-    mock_response.choices = [
-        MagicMock(message=MagicMock(
-            content="python-async\nconcurrency\nio-operations"))
-    ]
-    mock_openai.chat.completions.create.return_value = mock_response
-
-    # Test content
-    content = """title=""
-subtitle=""
-tags=[]
-categories=[]
-keywords=[]
----
-# Understanding Python's Async IO
-Python's asynchronous IO system is a powerful way to handle concurrent operations.
-This article explains the core concepts and best practices for using async/await in Python.
+    mock_openai.chat.completions.create.return_value = _response(api_content)
 
-## Key Concepts
-- Coroutines
-- Event Loop
-- Async/Await Syntax"""
+    content = ASYNC_IO_ARTICLE
 
-    service = OpenRouterService()
     tags = service.generate_tags(content)
 
     # Verify the tags
     assert isinstance(tags, list)
     assert len(tags) == 3  # Should always return exactly 3 tags
+    assert tags == expected_tags
     assert all(isinstance(tag, str)
                for tag in tags)  # All tags should be strings
     assert all(tag.strip() == tag for tag in tags)  # Tags should be stripped
@@ -240,92 +184,27 @@ This article explains the core concepts and best practices for using async/await
     assert "标签生成器" in call_args['messages'][0]['content']
 
 
-def test_generate_tags_insufficient_response(mock_openai):
-    """Test tag generation when API returns fewer than 3 tags."""
-    # Setup mock response with only one tag
-    mock_response = MagicMock()
-    mock_response.choices = [
-        MagicMock(message=MagicMock(content="python-web"))
-    ]
-    mock_openai.chat.completions.create.return_value = mock_response
-
-    # Test content
-    content = """title=""
-subtitle=""
-tags=[]
-categories=[]
-keywords=[]
----
-# Understanding Python
-A basic guide to Python programming."""
-
-    service = OpenRouterService()
-    tags = service.generate_tags(content)
-
-    # Verify we still get exactly 3 tags
-    assert len(tags) == 3
-    assert tags[0] == "python-web"  # First tag from API
-    assert tags[1] == "tag-2"  # Generated tag
-    assert tags[2] == "tag-3"  # Generated tag
-
-
-def test_generate_tags_excess_response(mock_openai):
-    """Test tag generation when API returns more than 3 tags."""
-    # Setup mock response with 5 tags
-    mock_response = MagicMock()
-    mock_response.choices = [
-        MagicMock(message=MagicMock(
-            content="python-web\nweb-dev\nbackend\ndjango\nflask"))
-    ]
-    mock_openai.chat.completions.create.return_value = mock_response
-
-    # Test content
-    content = """title=""
-subtitle=""
-tags=[]
-categories=[]
-keywords=[]
----
-# Python Web Development"""
-
-    service = OpenRouterService()
-    tags = service.generate_tags(content)
-
-    # Verify we get exactly 3 tags
-    assert len(tags) == 3
-    assert tags == ["python-web", "web-dev",
-                    "backend"]  # Should keep first 3 tags
-
-
-def test_suggest_category(mock_openai):
+@pytest.mark.parametrize("api_content,topic", [
+    ("软件工程", """# Best Practices in Software Design
+This article discusses SOLID principles, design patterns,
+and other best practices in software engineering."""),
+    # A category outside the predefined list is accepted as-is
+    ("云原生开发", """# Understanding Kubernetes and Cloud Native Development
+This article discusses cloud native development principles and Kubernetes basics."""),
+], ids=["existing", "new"])
+def test_suggest_category(mock_openai, service, api_content, topic):
     """Test category suggestion with mocked OpenAI client."""
     # Setup mock response
-    mock_response = MagicMock()
-    mock_response.choices = [
-        MagicMock(message=MagicMock(content="软件工程"))
-    ]
-    mock_openai.chat.completions.create.return_value = mock_response
+    mock_openai.chat.completions.create.return_value = _response(api_content)
 
-    # Test content about software engineering
-    content = """title=""
-subtitle=""
-tags=[]
-categories=[]
-keywords=[]
----
-# Best Practices in Software Design
-This article discusses SOLID principles, design patterns,
-and other best practices in software engineering."""
+    content = FRONT_MATTER + topic
 
-    service = OpenRouterService()
     category = service.suggest_category(content)
 
     # Verify the category
     assert isinstance(category, str)
-    assert category in ["个人观点", "实用总结", "方法论",
-                        "AI编程", "软件工程", "工程效率",
-                        "人工智能"]
-    assert category == "软件工程"  # Should match the mock response
+    assert len(category.split()) <= 3  # Should be at most 3 words
+    assert category == api_content  # Should match the mock response
 
     # Verify OpenAI client was called correctly
     mock_openai.chat.completions.create.assert_called_once()
@@ -335,60 +214,21 @@ and other best practices in software engineering."""
     assert "内容分类器" in call_args['messages'][0]['content']
 
 
-def test_suggest_category_new_category(mock_openai):
-    """Test category suggestion with a new category."""
-    # Setup mock response
-    mock_response = MagicMock()
-    mock_response.choices = [
-        MagicMock(message=MagicMock(content="云原生开发"))
-    ]
-    mock_openai.chat.completions.create.return_value = mock_response
-
-    # Test content about cloud native development
-    content = """title=""
-subtitle=""
-tags=[]
-categories=[]
-keywords=[]
----
-# Understanding Kubernetes and Cloud Native Development
-This article discusses cloud native development principles and Kubernetes basics."""
-
-    service = OpenRouterService()
-    category = service.suggest_category(content)
-
-    # Verify the category
-    assert isinstance(category, str)
-    assert len(category.split()) <= 3  # Should be at most 3 words
-    assert category == "云原生开发"  # Should match the mock response
-
-
-def test_suggest_category_empty_content(mock_openai):
+def test_suggest_category_empty_content(mock_openai, service):
     """Test category suggestion with empty content."""
     # Setup mock response
-    mock_response = MagicMock()
-    mock_response.choices = [
-        MagicMock(message=MagicMock(content="个人观点"))
-    ]
-    mock_openai.chat.completions.create.return_value = mock_response
+    mock_openai.chat.completions.create.return_value = _response("个人观点")
 
-    service = OpenRouterService()
     category = service.suggest_category("")
 
     # Should default to a safe category for empty content
     assert category == "个人观点"
 
 
-def test_suggest_category_max_categories(mock_openai):
+def test_suggest_category_max_categories(mock_openai, service):
     """Test category suggestion respects maximum category limit."""
     # Setup mock response
-    mock_response = MagicMock()
-    mock_response.choices = [
-        MagicMock(message=MagicMock(content="软件工程"))
-    ]
-    mock_openai.chat.completions.create.return_value = mock_response
-
-    service = OpenRouterService()
+    mock_openai.chat.completions.create.return_value = _response("软件工程")
 
     # Simulate having 10 existing categories
     existing_categories = [
@@ -403,33 +243,14 @@ def test_suggest_category_max_categories(mock_openai):
     assert category in existing_categories
 
 
-def test_generate_seo_keywords(mock_openai):
+def test_generate_seo_keywords(mock_openai, service):
     """Test SEO keyword generation with mocked OpenAI client."""
     # Setup mock response
-    mock_response = MagicMock()
-    mock_response.choices = [
-        MagicMock(message=MagicMock(
-            content="Python编程, 异步IO, 并发编程, 协程, 事件循环"))
-    ]
-    mock_openai.chat.completions.create.return_value = mock_response
-
-    # Test content
-    content = """title=""
-subtitle=""
-tags=[]
-categories=[]
-keywords=[]
----
-# Understanding Python's Async IO
-Python's asynchronous IO system is a powerful way to handle concurrent operations.
-This article explains the core concepts and best practices for using async/await in Python.
+    mock_openai.chat.completions.create.return_value = _response(
+        "Python编程, 异步IO, 并发编程, 协程, 事件循环")
 
-## Key Concepts
-- Coroutines
-- Event Loop
-- Async/Await Syntax"""
+    content = ASYNC_IO_ARTICLE
 
-    service = OpenRouterService()
     keywords = service.generate_seo_keywords(content)
 
     # Verify the keywords
@@ -449,9 +270,8 @@ This article explains the core concepts and best practices for using async/await
     assert "SEO关键词" in call_args['messages'][0]['content']
 
 
-def test_generate_seo_keywords_empty_content(mock_openai):
+def test_generate_seo_keywords_empty_content(mock_openai, service):
     """Test SEO keyword generation with empty content."""
-    service = OpenRouterService()
     keywords = service.generate_seo_keywords("")
 
     # Should return empty list for empty content
@@ -459,30 +279,18 @@ def test_generate_seo_keywords_empty_content(mock_openai):
     assert len(keywords) == 0
 
 
-def test_generate_seo_keywords_long_response(mock_openai):
+def test_generate_seo_keywords_long_response(mock_openai, service):
     """Test SEO keyword generation with long response."""
     # Setup mock response with many keywords
-    mock_response = MagicMock()
-    mock_response.choices = [
-        MagicMock(message=MagicMock(
-            content="Python编程, 异步IO, 并发编程, 协程, 事件循环, 异步编程, Python开发, "
-            "软件工程, 最佳实践, 性能优化, IO密集型, 代码整洁, 资源利用, "
-            "异步开发, Python异步, 开发技巧, 系统架构, 编程范式, 技术选型, "
-            "架构设计, 编程思想, 开发效率"))
-    ]
-    mock_openai.chat.completions.create.return_value = mock_response
+    mock_openai.chat.completions.create.return_value = _response(
+        "Python编程, 异步IO, 并发编程, 协程, 事件循环, 异步编程, Python开发, "
+        "软件工程, 最佳实践, 性能优化, IO密集型, 代码整洁, 资源利用, "
+        "异步开发, Python异步, 开发技巧, 系统架构, 编程范式, 技术选型, "
+        "架构设计, 编程思想, 开发效率")
 
-    # Test content
-    content = """title=""
-subtitle=""
-tags=[]
-categories=[]
-keywords=[]
----
-# Understanding Python's Async IO
+    content = FRONT_MATTER + """# Understanding Python's Async IO
 A comprehensive guide to async/await in Python."""
 
-    service = OpenRouterService()
     keywords = service.generate_seo_keywords(content)
 
     # Verify we get at most 20 keywords
@@ -490,3 +298,101 @@ A comprehensive guide to async/await in Python."""
     assert len(keywords) <= 20
     assert all(isinstance(kw, str) for kw in keywords)
     assert all(len(kw.split()) <= 3 for kw in keywords)
+
+
+SUMMARY_CONTENT = FRONT_MATTER + """# Understanding Python's Async IO
+Python's asynchronous IO system is a powerful way to handle concurrent operations."""
+
+
+def test_summarize_all(mock_openai, service):
+    """Test all metadata fields come from a single API call."""
+    mock_openai.chat.completions.create.return_value = _response(
+        '{"title": "Python异步IO编程指南", "subtitle": "深入解析Python异步IO编程",'
+        ' "tags": ["Python-Async", "concurrency"], "category": "软件工程",'
+        ' "keywords": ["Python编程", "异步IO", "Python编程"]}')
+
+    summary = service.summarize_all(SUMMARY_CONTENT)
+
+    assert summary == {
+        "title": "Python异步IO编程指南",
+        "subtitle": "深入解析Python异步IO编程。",
+        "tags": ["python-async", "concurrency", "tag-3"],
+        "category": "软件工程",
+        "keywords": ["Python编程", "异步IO"],
+    }
+    mock_openai.chat.completions.create.assert_called_once()
+    call_args = mock_openai.chat.completions.create.call_args[1]
+    assert call_args['model'] == "deepseek/deepseek-v3-base:free"
+    assert "JSON" in call_args['messages'][0]['content']
+
+
+def test_summarize_all_is_cached_per_content(mock_openai, service):
+    """Test a second call with the same content makes no API call."""
+    mock_openai.chat.completions.create.return_value = _response(
+        'Sure! {"title": "缓存测试", "subtitle": "一句话", "tags": "a, b, c",'
+        ' "category": "方法论", "keywords": "x, y"} Hope this helps.')
+
+    first = service.summarize_all(SUMMARY_CONTENT + "\ncached")
+    first["tags"].append("mutated")
+    second = service.summarize_all(SUMMARY_CONTENT + "\ncached")
+
+    assert second["tags"] == ["a", "b", "c"]
+    assert second["keywords"] == ["x", "y"]
+    mock_openai.chat.completions.create.assert_called_once()
+
+
+def test_summarize_all_without_json(mock_openai, service):
+    """Test a response without a JSON object is rejected."""
+    mock_openai.chat.completions.create.return_value = _response("标题：没有JSON")
+
+    with pytest.raises(ValueError):
+        service.summarize_all(SUMMARY_CONTENT + "\nno json")
+
+
+def test_summarize_articles_runs_concurrently(mock_openai, service):
+    """Test articles are summarized in parallel and returned in order."""
+    lock = threading.Lock()
+    active = [0]
+    peak = [0]
+
+    def fake_create(**kwargs):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.02)
+        with lock:
+            active[0] -= 1
+        title = kwargs['messages'][1]['content'].split()[-1]
+        return _response(json.dumps({"title": title}))
+
+    mock_openai.chat.completions.create.side_effect = fake_create
+    contents = [f"---\n# 文章 article{i}" for i in range(16)]
+
+    summaries = service.summarize_articles(contents, max_workers=4)
+
+    assert [summary["title"] for summary in summaries] == [
+        f"article{i}" for i in range(16)]
+    assert mock_openai.chat.completions.create.call_count == 16
+    assert 1 < peak[0] <= 4
+
+
+def test_completions_served_from_persistent_cache(mock_openai, tmp_path):
+    """Test a repeated request is answered from disk without an API call."""
+    mock_openai.chat.completions.create.return_value = _response("缓存的标题")
+    content = "---\n# 缓存测试\n同样的内容不应再次请求接口。"
+    cache_path = str(tmp_path / ".llm_cache.sqlite")
+
+    title = OpenRouterService(cache=LLMCache(cache_path)).summarize_for_title(content)
+    assert mock_openai.chat.completions.create.call_count == 1
+
+    # A fresh service over the same file makes zero API calls
+    again = OpenRouterService(cache=LLMCache(cache_path)).summarize_for_title(content)
+    assert again == title
+    assert mock_openai.chat.completions.create.call_count == 1
+
+
+def test_default_cache_under_article_source(mock_openai, tmp_path, monkeypatch):
+    """Test the service keeps its cache in CD20_ARTICLE_SOURCE when set."""
+    monkeypatch.setenv('CD20_ARTICLE_SOURCE', str(tmp_path))
+    service = OpenRouterService()
+    assert service.cache.path == str(tmp_path / ".llm_cache.sqlite")
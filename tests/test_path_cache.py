@@ -0,0 +1,84 @@
+import os
+
+from wx.path_cache import existence_cache, path_exists
+
+
+def test_path_exists_without_cache_sees_changes(tmp_path):
+    """Outside a cache scope every call hits the filesystem."""
+    img = tmp_path / "a.png"
+    assert not path_exists(str(img))
+    img.touch()
+    assert path_exists(str(img))
+
+
+def test_path_exists_memoized_inside_scope(tmp_path):
+    """Inside a cache scope the first answer for a path is reused."""
+    img = tmp_path / "a.png"
+    with existence_cache():
+        assert not path_exists(str(img))
+        img.touch()
+        assert not path_exists(str(img))
+    assert path_exists(str(img))
+
+
+def test_nested_scopes_share_cache(tmp_path, monkeypatch):
+    """Nested scopes reuse the outer cache instead of resetting it."""
+    img = str(tmp_path / "a.png")
+    calls = []
+    real_exists = os.path.exists
+
+    def counting_exists(path):
+        calls.append(path)
+        return real_exists(path)
+
+    monkeypatch.setattr(os.path, "exists", counting_exists)
+    with existence_cache():
+        path_exists(img)
+        with existence_cache():
+            path_exists(img)
+        path_exists(img)
+    assert calls == [img]
+
+
+def test_directory_listed_once_per_scope(tmp_path, monkeypatch):
+    """All lookups in one directory are served from a single scandir."""
+    for name in ("a.png", "b.png", "c.png"):
+        (tmp_path / name).touch()
+    scanned = []
+    real_scandir = os.scandir
+
+    def counting_scandir(path):
+        scanned.append(path)
+        return real_scandir(path)
+
+    monkeypatch.setattr(os, "scandir", counting_scandir)
+    with existence_cache():
+        for name in ("a.png", "b.png", "c.png"):
+            assert path_exists(str(tmp_path / name))
+        assert not path_exists(str(tmp_path / "missing.png"))
+    assert scanned == [str(tmp_path)]
+
+
+def test_broken_symlink_does_not_exist(tmp_path):
+    """A dangling symlink is reported missing, as with os.path.exists."""
+    link = tmp_path / "dangling.png"
+    link.symlink_to(tmp_path / "nowhere.png")
+    with existence_cache():
+        assert not path_exists(str(link))
+
+
+def test_missing_directory_needs_no_per_file_stat(tmp_path, monkeypatch):
+    """Lookups under a missing directory are answered without stat calls."""
+    missing_dir = tmp_path / "nope"
+    calls = []
+    real_exists = os.path.exists
+
+    def counting_exists(path):
+        calls.append(path)
+        return real_exists(path)
+
+    monkeypatch.setattr(os.path, "exists", counting_exists)
+    with existence_cache():
+        for name in ("a.png", "b.png", "c.png"):
+            assert not path_exists(str(missing_dir / name))
+    assert calls == []
@@ -1,10 +1,11 @@
 import pytest
 import os
 import pickle
+import hashlib
 from pathlib import Path
 import shutil
 from wx.wx_cache import WxCache
-from wx.error_handler import FileSystemError
+from wx.error_handler import CacheError, FileSystemError
 
 
 @pytest.fixture
@@ -49,6 +50,7 @@ def test_init_without_dir_and_env():
 
 def test_init_with_existing_cache(cache_with_existing_data):
     """测试加载已存在的缓存文件"""
+    assert os.path.exists(cache_with_existing_data.CACHE_STORE)
     assert "test_digest" in cache_with_existing_data.CACHE
     assert cache_with_existing_data.CACHE["test_digest"] == [
         "test_media_id",
@@ -110,6 +112,71 @@ def test_cache_persistence(temp_dir):
     assert result == ["media_id_1", "media_url_1"]
 
 
+def test_many_inserts(temp_dir):
+    """测试大量写入后新实例能读到全部条目"""
+    cache = WxCache(str(temp_dir))
+    for i in range(2000):
+        test_file = temp_dir / f"many_{i}.txt"
+        test_file.write_text(str(i))
+        cache.set(str(test_file), f"id_{i}", f"url_{i}")
+
+    reloaded = WxCache(str(temp_dir))
+    assert len(reloaded.CACHE) == 2000
+    assert reloaded.get(str(temp_dir / "many_1999.txt")) == ["id_1999", "url_1999"]
+
+
+def test_legacy_pickle_migrated_once(cache_with_existing_data, temp_dir):
+    """测试旧版 Cache.bin 导入后改名，不会被重复导入"""
+    assert not (temp_dir / "Cache.bin").exists()
+    assert (temp_dir / "Cache.bin.migrated").exists()
+
+    reopened = WxCache(str(temp_dir))
+    assert reopened.CACHE["test_digest"] == ["test_media_id", "test_media_url"]
+
+
+def test_legacy_import_retried_after_failure(temp_dir):
+    """测试旧缓存导入失败后，下次打开时（数据库已存在）仍会重新导入"""
+    (temp_dir / "Cache.bin").write_bytes(b"not a pickle")
+    with pytest.raises(CacheError):
+        WxCache(str(temp_dir))
+    assert (temp_dir / "Cache.sqlite").exists()
+
+    with open(temp_dir / "Cache.bin", "wb") as f:
+        pickle.dump({"test_digest": ["test_media_id", "test_media_url"]}, f)
+    cache = WxCache(str(temp_dir))
+    assert cache.CACHE["test_digest"] == ["test_media_id", "test_media_url"]
+    assert (temp_dir / "Cache.bin.migrated").exists()
+
+
+def test_legacy_import_keeps_newer_entries(temp_dir):
+    """测试重新导入旧缓存时不覆盖数据库中已有的条目"""
+    cache = WxCache(str(temp_dir))
+    cache.set(str(temp_dir / "test.txt"), "new_media_id", "new_url")
+    digest = cache._WxCache__file_digest(str(temp_dir / "test.txt"))
+    cache.close()
+    with open(temp_dir / "Cache.bin", "wb") as f:
+        pickle.dump({digest: ["old_media_id", "old_url"]}, f)
+
+    reopened = WxCache(str(temp_dir))
+    assert reopened.CACHE[digest] == ["new_media_id", "new_url"]
+
+
+def test_legacy_log_migrated(temp_dir):
+    """测试追加日志格式的 Cache.log（含写了一半的末尾记录）可以导入"""
+    records = [("digest_1", "id_1", "url_1"), ("digest_2", "id_2", None),
+               ("digest_1", "id_3", "url_3")]
+    data = b"".join(pickle.dumps(r, protocol=pickle.HIGHEST_PROTOCOL)
+                    for r in records)
+    (temp_dir / "Cache.log").write_bytes(data + data[:5])
+
+    cache = WxCache(str(temp_dir))
+    assert dict(cache.CACHE) == {
+        "digest_1": ["id_3", "url_3"],
+        "digest_2": ["id_2", None],
+    }
+    assert (temp_dir / "Cache.log.migrated").exists()
+
+
 def test_file_digest(temp_dir):
     """测试文件摘要计算"""
     cache = WxCache(str(temp_dir))
@@ -124,3 +191,83 @@ def test_file_digest(temp_dir):
     test_file.write_text("different content")
     digest3 = cache._WxCache__file_digest(str(test_file))
     assert digest1 != digest3
+
+
+def test_file_digest_large_file(temp_dir):
+    """测试大文件分块计算的摘要与整体计算一致"""
+    cache = WxCache(str(temp_dir))
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    big_file = temp_dir / "big.bin"
+    big_file.write_bytes(data)
+
+    digest = cache._WxCache__file_digest(str(big_file))
+    assert digest == hashlib.sha256(data).hexdigest()
+
+
+def test_file_digest_reused_for_unchanged_file(temp_dir, monkeypatch):
+    """测试文件未变化时不再重新读取文件"""
+    cache = WxCache(str(temp_dir))
+    test_file = temp_dir / "test.txt"
+    opened = []
+    real_open = open
+
+    def counting_open(path, *args, **kwargs):
+        opened.append(path)
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr("wx.wx_cache.open", counting_open, raising=False)
+    digest1 = cache._WxCache__file_digest(str(test_file))
+    digest2 = cache._WxCache__file_digest(str(test_file))
+    assert digest1 == digest2
+    assert opened == [str(test_file)]
+
+
+def test_md5_keyed_entry_found_and_rekeyed(temp_dir):
+    """测试旧版本以 md5 为键的条目仍能命中，并改存到新摘要下"""
+    test_file = temp_dir / "test.txt"
+    legacy_digest = hashlib.md5(test_file.read_bytes()).hexdigest()
+    with open(temp_dir / "Cache.bin", "wb") as f:
+        pickle.dump({legacy_digest: ["old_media_id", "old_url"]}, f)
+
+    cache = WxCache(str(temp_dir))
+    assert cache.is_cached(str(test_file))
+    assert cache.get(str(test_file)) == ["old_media_id", "old_url"]
+
+    digest = cache._WxCache__file_digest(str(test_file))
+    assert cache.CACHE[digest] == ["old_media_id", "old_url"]
+
+
+def test_miss_reads_file_once_without_md5_keys(temp_dir, monkeypatch):
+    """测试没有旧 md5 键时，未命中的文件只读取一次，不计算 md5"""
+    cache = WxCache(str(temp_dir))
+    test_file = temp_dir / "test.txt"
+    opened = []
+    real_open = open
+
+    def counting_open(path, *args, **kwargs):
+        opened.append(path)
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr("wx.wx_cache.open", counting_open, raising=False)
+    for _ in range(3):
+        assert cache.get(str(test_file)) is None
+    assert opened == [str(test_file)]
+
+
+def test_md5_fallback_digest_memoized(temp_dir, monkeypatch):
+    """测试存在旧 md5 键时，未命中文件的 md5 也只计算一次"""
+    with open(temp_dir / "Cache.bin", "wb") as f:
+        pickle.dump({"0" * 32: ["old_media_id", "old_url"]}, f)
+    cache = WxCache(str(temp_dir))
+    test_file = temp_dir / "test.txt"
+    opened = []
+    real_open = open
+
+    def counting_open(path, *args, **kwargs):
+        opened.append(path)
+        return real_open(path, *args, **kwargs)
+
+    monkeypatch.setattr("wx.wx_cache.open", counting_open, raising=False)
+    for _ in range(3):
+        assert cache.get(str(test_file)) is None
+    assert opened == [str(test_file)] * 2  # 一次 sha256，一次 md5
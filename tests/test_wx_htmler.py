@@ -1,13 +1,15 @@
+import copy
 import os
+import re
 import pytest
-import tempfile
 import shutil
+import tracemalloc
 from pathlib import Path
 from wx.wx_htmler import WxHtmler
 from wx.md_file import MarkdownFile
 
 # Constants
-REQUIRED_TEMPLATES = [
+REQUIRED_TEMPLATES = frozenset({
     "header.tmpl",
     "para.tmpl",
     "sub.tmpl",
@@ -17,7 +19,7 @@ REQUIRED_TEMPLATES = [
     "code.tmpl",
     "ref_header.tmpl",
     "ref_link.tmpl",
-]
+})
 
 EXPECTED_STYLES = {
     "paragraph": 'style="font-size: 14px; padding-top: 8px; padding-bottom: 8px; margin: 0; line-height: 22px;"',
@@ -27,51 +29,123 @@ EXPECTED_STYLES = {
 }
 
 
-@pytest.fixture
-def temp_test_dir():
-    """创建临时测试目录并复制测试数据"""
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_path = Path(temp_dir)
-
-        # 复制测试数据
-        testdata_dir = Path("testdata")
-        if testdata_dir.exists():
-            # 复制所有文件和目录，包括 testdata/assets
-            for item in testdata_dir.glob("*"):
-                if item.is_file():
-                    shutil.copy2(item, temp_path / item.name)
-                elif item.is_dir():
-                    shutil.copytree(item, temp_path / item.name)
-
-        # 复制模板文件到 assets 目录
-        assets_dir = Path("assets")
-        if assets_dir.exists():
-            assets_temp_dir = temp_path / "assets"
-            assets_temp_dir.mkdir(exist_ok=True)
-            for item in assets_dir.glob("*.tmpl"):
-                shutil.copy2(item, assets_temp_dir / item.name)
-
-        yield temp_path
+IMAGE1 = ("thumb1", "https://example.com/image1.jpg")
+IMAGE2 = ("thumb2", "https://example.com/image2.png")
+
+IMAGE_URL_CASES = [
+    pytest.param(
+        "![alt text](image1.jpg) and ![alt text](image2.png)",
+        {"image1.jpg": IMAGE1, "image2.png": IMAGE2},
+        "![alt text](https://example.com/image1.jpg) and ![alt text](https://example.com/image2.png)",
+        id="basic"),
+    pytest.param(
+        "![alt text](image1.jpg)", {}, "![alt text](image1.jpg)",
+        id="no_uploaded_images"),
+    pytest.param(
+        "Just some text without images", {"image1.jpg": IMAGE1},
+        "Just some text without images",
+        id="no_images_in_content"),
+    pytest.param(
+        "![alt text](image1.jpg) ![alt text](image1.jpg)",
+        {"image1.jpg": IMAGE1},
+        "![alt text](https://example.com/image1.jpg) ![alt text](https://example.com/image1.jpg)",
+        id="repeated_image"),
+    pytest.param(
+        "![alt text](image-1.jpg) ![alt text](image_2.png)",
+        {
+            "image-1.jpg": ("thumb1", "https://example.com/image-1.jpg"),
+            "image_2.png": ("thumb2", "https://example.com/image_2.png"),
+        },
+        "![alt text](https://example.com/image-1.jpg) ![alt text](https://example.com/image_2.png)",
+        id="special_characters"),
+    pytest.param(
+        """# Sample Title
+![First Image](image1.jpg)
+Some text here
+![Second Image](image2.png)
+More text
+![Third Image](image3.gif)""",
+        {
+            "image1.jpg": IMAGE1,
+            "image2.png": IMAGE2,
+            "image3.gif": ("thumb3", "https://example.com/image3.gif"),
+        },
+        """# Sample Title
+![First Image](https://example.com/image1.jpg)
+Some text here
+![Second Image](https://example.com/image2.png)
+More text
+![Third Image](https://example.com/image3.gif)""",
+        id="markdown_document"),
+]
 
 
-@pytest.fixture
-def wx_htmler(temp_test_dir):
-    """创建 WxHtmler 实例"""
+def _stage(src, dst):
+    """用硬链接代替复制；跨文件系统等无法链接时退回到 copy2
+
+    测试只读取这些文件，不会写回，所以可以和仓库中的文件共用
+    """
+    try:
+        os.link(src, dst)
+    except OSError:
+        shutil.copy2(src, dst)
+    return dst
+
+
+@pytest.fixture(scope="session")
+def templates_dir(tmp_path_factory):
+    """只复制模板文件，整个测试会话只复制一次
+
+    目录下的 assets 放模板，wx_html_debug 放调试 HTML，
+    而不是工作目录下各 worker 共享的 ./assets
+    """
+    # 测试只读取这些文件，可以共享；pytest-xdist 下每个 worker 各有一份
+    temp_path = tmp_path_factory.mktemp("templates")
+
+    assets_dir = Path("assets")
+    if assets_dir.exists():
+        shutil.copytree(
+            assets_dir, temp_path / "assets", dirs_exist_ok=True,
+            ignore=lambda _, names: [n for n in names if not n.endswith(".tmpl")],
+            copy_function=_stage)
+    else:
+        (temp_path / "assets").mkdir()
+    (temp_path / "wx_html_debug").mkdir()
+
+    return temp_path
+
+
+@pytest.fixture(scope="session")
+def testdata_dir(tmp_path_factory):
+    """复制测试数据，整个测试会话只复制一次"""
+    temp_path = tmp_path_factory.mktemp("testdata")
+
+    testdata_dir = Path("testdata")
+    if testdata_dir.exists():
+        # 复制所有文件和目录，包括 testdata/assets
+        shutil.copytree(testdata_dir, temp_path, dirs_exist_ok=True,
+                        copy_function=_stage)
+
+    return temp_path
+
+
+def _make_htmler(templates_dir):
+    """创建使用临时目录资源文件的 WxHtmler"""
     htmler = WxHtmler()
     # 使用临时目录中的资源文件
-    htmler.assets_dir = str(temp_test_dir / "assets")
+    htmler.assets_dir = str(templates_dir / "assets")
+    htmler.debug_dir = str(templates_dir / "wx_html_debug")
     return htmler
 
 
-@pytest.fixture
-def sample_md_file(temp_test_dir):
-    """创建示例 MarkdownFile 对象"""
+def _make_md_file(testdata_dir):
+    """创建示例 MarkdownFile 对象，图片视为已上传"""
     # 使用临时目录中的测试文件
     md_file_name = "a_template.md"
 
     # 创建 MarkdownFile 对象
     md_file = MarkdownFile(source_dir=str(
-        temp_test_dir), md_file_name=md_file_name)
+        testdata_dir), md_file_name=md_file_name)
     md_file.image_uploaded = True
     md_file.uploaded_images = {
         "assets/exists.png": ["media_id_123", "https://example.com/exists.png"]
@@ -79,14 +153,60 @@ def sample_md_file(temp_test_dir):
     return md_file
 
 
+@pytest.fixture
+def wx_htmler(templates_dir):
+    """创建 WxHtmler 实例"""
+    return _make_htmler(templates_dir)
+
+
+@pytest.fixture(scope="module")
+def plain_htmler(templates_dir):
+    """只调用无状态方法的测试共用一个 WxHtmler"""
+    return _make_htmler(templates_dir)
+
+
+@pytest.fixture(scope="module")
+def _parsed_md_file(testdata_dir):
+    """a_template.md 在模块内只解析一次"""
+    return _make_md_file(testdata_dir)
+
+
+@pytest.fixture
+def sample_md_file(_parsed_md_file):
+    """创建示例 MarkdownFile 对象"""
+    # 深拷贝解析结果，测试可以随意修改而不影响其他测试
+    return copy.deepcopy(_parsed_md_file)
+
+
+@pytest.fixture(scope="module")
+def sample_body_text(_parsed_md_file):
+    """示例文章正文，模块内各测试共用同一个字符串"""
+    return _parsed_md_file.body.body_text
+
+
+# 渲染结果只被断言读取，整个模块共用一次渲染；
+# 各自使用新的 WxHtmler，避免 uploaded_images 状态互相影响
+@pytest.fixture(scope="module")
+def rendered_html(templates_dir, _parsed_md_file, sample_body_text):
+    """示例文章带已上传图片的渲染结果"""
+    return _make_htmler(templates_dir).render_markdown(
+        sample_body_text, _parsed_md_file.uploaded_images
+    )
+
+
+@pytest.fixture(scope="module")
+def rendered_html_without_images(templates_dir, sample_body_text):
+    """示例文章不带图片映射的渲染结果"""
+    return _make_htmler(templates_dir).render_markdown(sample_body_text)
+
+
 # Helper functions
 
 
 def assert_html_contains(html: str, expected_elements: list):
-    """验证HTML包含所有预期的元素"""
-    for element in expected_elements:
-        print(f"Checking element: {element}")
-        assert element in html, f"Expected element not found: {element}"
+    """验证HTML包含所有预期的元素，失败时一次列出全部缺失的元素"""
+    missing = [element for element in expected_elements if element not in html]
+    assert not missing, f"Expected elements not found: {missing}"
 
 
 def assert_styles_applied(html: str):
@@ -98,14 +218,16 @@ def assert_styles_applied(html: str):
         'font-weight: bold',
         'color: black',
     ]
-    for pattern in expected_style_patterns:
-        assert pattern in html, f"Missing style pattern: {pattern}"
+    missing = [pattern for pattern in expected_style_patterns
+               if pattern not in html]
+    assert not missing, f"Missing style patterns: {missing}"
 
 
 class TestWxHtmler:
     """WxHtmler 类的测试集"""
 
-    def test_md_to_original_html(self, wx_htmler, sample_md_file):
+    def test_md_to_original_html(self, wx_htmler, sample_md_file,
+                                 sample_body_text, dump_html):
         """测试 Markdown 渲染功能"""
         expected_elements = [
             '<img alt="local image" src="./assets/exists.png" />',
@@ -116,16 +238,14 @@ class TestWxHtmler:
             "</blockquote>",
         ]
         html = wx_htmler.md_to_original_html(
-            sample_md_file.body.body_text, sample_md_file.uploaded_images
+            sample_body_text, sample_md_file.uploaded_images
         )
-        print(html)
+        dump_html(html)
         assert_html_contains(html, expected_elements)
 
-    def test_render_markdown(self, wx_htmler, sample_md_file):
+    def test_render_markdown(self, rendered_html):
         """测试 Markdown 渲染功能"""
-        html = wx_htmler.render_markdown(
-            sample_md_file.body.body_text, sample_md_file.uploaded_images
-        )
+        html = rendered_html
 
         expected_elements = [
             '>Sample Title<',
@@ -143,9 +263,9 @@ class TestWxHtmler:
         assert_html_contains(html, expected_elements)
         assert_styles_applied(html)
 
-    def test_css_beautify(self, wx_htmler, sample_md_file):
+    def test_css_beautify(self, rendered_html_without_images):
         """测试 CSS 美化功能"""
-        html = wx_htmler.render_markdown(sample_md_file.body.body_text)
+        html = rendered_html_without_images
         expected_classes = ["footnotes", "codehilite"]
         assert_html_contains(
             html, [f'class="{cls}"' for cls in expected_classes])
@@ -160,21 +280,21 @@ class TestWxHtmler:
         for pattern in expected_style_patterns:
             assert pattern in html, f"Missing style pattern: {pattern}"
 
-    def test_link_processing(self, wx_htmler, sample_md_file):
+    def test_link_processing(self, rendered_html_without_images):
         """测试链接处理功能"""
-        html = wx_htmler.render_markdown(sample_md_file.body.body_text)
+        html = rendered_html_without_images
         expected_classes = ["footnotes", "footnote-item", "footnote-num"]
         assert_html_contains(
             html, [f'class="{cls}"' for cls in expected_classes])
 
-    def test_image_processing(self, wx_htmler, sample_md_file):
+    def test_image_processing(self, wx_htmler, sample_md_file,
+                              sample_body_text, dump_html):
         """测试图片处理功能"""
         input_html = wx_htmler.md_to_original_html(
-            sample_md_file.body.body_text, sample_md_file.uploaded_images
+            sample_body_text, sample_md_file.uploaded_images
         )
-        print(input_html)
         result = wx_htmler._fix_image(input_html)
-        print(result)
+        dump_html(result)
         expected_elements = [
             "<figure",
             '<img alt="local image" src="./assets/exists.png" />',
@@ -184,9 +304,9 @@ class TestWxHtmler:
         ]
         assert_html_contains(result, expected_elements)
 
-    def test_code_highlighting(self, wx_htmler, sample_md_file):
+    def test_code_highlighting(self, rendered_html_without_images):
         """测试代码高亮功能"""
-        html = wx_htmler.render_markdown(sample_md_file.body.body_text)
+        html = rendered_html_without_images
         expected_elements = [
             'class="codehilite"',
             'class="language-python"',
@@ -196,7 +316,7 @@ class TestWxHtmler:
 
         assert_html_contains(html, expected_elements)
 
-    def test_code_block_css_generation(self, wx_htmler):
+    def test_code_block_css_generation(self, wx_htmler, dump_html):
         """测试代码块的 HTML 生成
         验证：
         1. 代码块的样式（class="codehilite"）
@@ -224,11 +344,7 @@ def process_data(data):
 End of test.
 """
         html = wx_htmler.render_markdown(markdown_content)
-
-        # 打印生成的 HTML，方便调试
-        print("\n=== Generated HTML ===")
-        print(html)
-        print("=== End of HTML ===\n")
+        dump_html(html)
 
         # 验证代码块样式
         expected_style = [
@@ -253,9 +369,13 @@ End of test.
             '    }',
             '    return result'
         ]
+        # 代码行按文档顺序出现，从上一行之后继续查找，不重复扫描前面的内容
+        cursor = 0
         for line in expected_code:
-            print(f"Checking line: {line}")  # 打印正在检查的行
-            assert line in html, f"Missing or incorrect code line: {line}"
+            idx = html.find(line, cursor)
+            assert idx >= 0, \
+                f"Missing or incorrect code line {line!r} after offset {cursor}"
+            cursor = idx + len(line)
 
         # 验证特殊字符处理
         expected_special = [
@@ -265,7 +385,6 @@ End of test.
             '&quot;item2&quot;'   # 引号
         ]
         for special in expected_special:
-            print(f"Checking special: {special}")  # 打印正在检查的特殊字符
             assert special in html, f"Special character not properly escaped: {special}"
 
     def test_generate_article(self, wx_htmler, sample_md_file):
@@ -286,69 +405,33 @@ End of test.
 
     def test_template_files_exist(self, wx_htmler):
         """测试模板文件是否存在"""
-        for template in REQUIRED_TEMPLATES:
-            template_path = os.path.join(wx_htmler.assets_dir, template)
-            assert os.path.exists(
-                template_path), f"Template file {template} not found"
-
-    def test_update_image_urls(self):
-        htmler = WxHtmler()
-
-        # Test case 1: Basic image replacement
-        content = "![alt text](image1.jpg) and ![alt text](image2.png)"
-        uploaded_images = {
-            "image1.jpg": ("thumb1", "https://example.com/image1.jpg"),
-            "image2.png": ("thumb2", "https://example.com/image2.png"),
-        }
-        expected = "![alt text](https://example.com/image1.jpg) and ![alt text](https://example.com/image2.png)"
-        assert htmler.update_image_urls(content, uploaded_images) == expected
-
-        # Test case 2: Empty uploaded_images
-        content = "![alt text](image1.jpg)"
-        uploaded_images = {}
-        assert htmler.update_image_urls(content, uploaded_images) == content
-
-        # Test case 3: No images in content
-        content = "Just some text without images"
+        with os.scandir(wx_htmler.assets_dir) as entries:
+            existing = {entry.name for entry in entries}
+        missing = sorted(REQUIRED_TEMPLATES - existing)
+        assert not missing, f"Template files not found: {missing}"
+
+    @pytest.mark.parametrize("content,uploaded_images,expected",
+                             IMAGE_URL_CASES)
+    def test_update_image_urls(self, plain_htmler, content, uploaded_images,
+                               expected):
+        assert plain_htmler.update_image_urls(
+            content, uploaded_images) == expected
+
+    def test_update_image_urls_skips_work_without_images(self, plain_htmler):
+        """没有图片映射或正文没有图片时，原样返回且不产生新字符串"""
+        content = "Just some text without images " * 1000
         uploaded_images = {"image1.jpg": (
             "thumb1", "https://example.com/image1.jpg")}
-        assert htmler.update_image_urls(content, uploaded_images) == content
-
-        # Test case 4: Multiple occurrences of same image
-        content = "![alt text](image1.jpg) ![alt text](image1.jpg)"
-        uploaded_images = {"image1.jpg": (
-            "thumb1", "https://example.com/image1.jpg")}
-        expected = "![alt text](https://example.com/image1.jpg) ![alt text](https://example.com/image1.jpg)"
-        assert htmler.update_image_urls(content, uploaded_images) == expected
-
-        # Test case 5: Images with special characters
-        content = "![alt text](image-1.jpg) ![alt text](image_2.png)"
-        uploaded_images = {
-            "image-1.jpg": ("thumb1", "https://example.com/image-1.jpg"),
-            "image_2.png": ("thumb2", "https://example.com/image_2.png"),
-        }
-        expected = "![alt text](https://example.com/image-1.jpg) ![alt text](https://example.com/image_2.png)"
-        assert htmler.update_image_urls(content, uploaded_images) == expected
 
-        # Test case 6: Multiple images in markdown content
-        content = """# Sample Title
-![First Image](image1.jpg)
-Some text here
-![Second Image](image2.png)
-More text
-![Third Image](image3.gif)"""
-        uploaded_images = {
-            "image1.jpg": ("thumb1", "https://example.com/image1.jpg"),
-            "image2.png": ("thumb2", "https://example.com/image2.png"),
-            "image3.gif": ("thumb3", "https://example.com/image3.gif"),
-        }
-        expected = """# Sample Title
-![First Image](https://example.com/image1.jpg)
-Some text here
-![Second Image](https://example.com/image2.png)
-More text
-![Third Image](https://example.com/image3.gif)"""
-        assert htmler.update_image_urls(content, uploaded_images) == expected
+        for images in ({}, uploaded_images):
+            tracemalloc.start()
+            try:
+                result = plain_htmler.update_image_urls(content, images)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            assert result is content
+            assert peak < 4096
 
     def test_h2_numbering(self, wx_htmler):
         """测试 h2 标题的编号和样式
@@ -405,13 +488,45 @@ More text
         for pattern in expected_other_patterns:
             assert pattern in html, f"Missing header pattern: {pattern}"
 
-        # 验证 h2 标题的顺序
-        h2_positions = [html.find(title) for title in [
-            "Second Title 1", "Second Title 2", "Second Title 3", "Second Title 4"]]
-        assert h2_positions == sorted(
-            h2_positions), "H2 titles are not in correct order"
+        # 验证 h2 标题的顺序：一次扫描按文档顺序取出全部标题
+        h2_titles = re.findall(r">(Second Title \d)<", html)
+        assert h2_titles == [
+            "Second Title 1", "Second Title 2", "Second Title 3", "Second Title 4"
+        ], "H2 titles are not in correct order"
 
         # 验证数字的顺序
-        number_positions = [html.find(f'>{i}</section>') for i in range(1, 5)]
-        assert number_positions == sorted(
-            number_positions), "H2 numbers are not in correct order"
+        numbers = re.findall(r">(\d+)</section>", html)
+        assert numbers == ["1", "2", "3", "4"], "H2 numbers are not in correct order"
+
+    def test_render_markdown_reuses_result(self, wx_htmler, monkeypatch):
+        """相同内容只渲染一次，uploaded_images 仍会记录"""
+        wx_htmler.debug = False
+        calls = []
+        real_md_to_html = wx_htmler.md_to_original_html
+
+        def counting_md_to_html(content, uploaded_images=None):
+            calls.append(content)
+            return real_md_to_html(content, uploaded_images)
+
+        monkeypatch.setattr(wx_htmler, "md_to_original_html",
+                            counting_md_to_html)
+        images = {"a.png": ["media_id", "https://example.com/a.png"]}
+
+        first = wx_htmler.render_markdown("# Title\n\nBody", images)
+        second = wx_htmler.render_markdown("# Title\n\nBody")
+        assert second == first
+        assert calls == ["# Title\n\nBody"]
+        assert wx_htmler.uploaded_images == images
+
+        wx_htmler.render_markdown("# Other")
+        assert len(calls) == 2
+
+    def test_render_markdown_debug_writes_every_render(self, wx_htmler):
+        """调试模式下不使用缓存，每次渲染都写出调试文件"""
+        saved = []
+        wx_htmler._save_debug_html = lambda content, name: saved.append(name)
+
+        wx_htmler.render_markdown("# Title")
+        wx_htmler.render_markdown("# Title")
+
+        assert saved == ["before_css", "after_css"] * 2
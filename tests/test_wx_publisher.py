@@ -1,6 +1,5 @@
 import os
 import shutil
-import tempfile
 from unittest.mock import Mock, patch
 import pytest
 from wx.wx_publisher import WxPublisher
@@ -11,18 +10,14 @@ from wx.image_processor import ImageProcessor
 
 
 @pytest.fixture
-def temp_test_dir():
+def temp_test_dir(tmp_path):
     """Create a temporary directory for test data"""
-    temp_dir = tempfile.mkdtemp()
+    temp_dir = str(tmp_path)
     # Copy test data to temp directory
     testdata_dir = os.path.join(os.path.dirname(__file__), "..", "testdata")
     shutil.copytree(
         os.path.join(testdata_dir, "assets"), os.path.join(temp_dir, "assets")
     )
-    shutil.copy2(
-        os.path.join(testdata_dir, "a_template.md"), os.path.join(
-            temp_dir, "test.md")
-    )
     # Create content for test.md
     with open(os.path.join(temp_dir, "test.md"), "w", encoding="utf-8") as f:
         f.write(
@@ -38,18 +33,15 @@ draft= "false"
 This is a test article.
 """
         )
-    yield temp_dir
-    # Cleanup
-    shutil.rmtree(temp_dir)
+    return temp_dir
 
 
 @pytest.fixture
 def mock_wx_client():
     with patch("wx.wx_publisher.WxClient") as mock:
         client = mock.return_value
-        client.upload_article_draft.side_effect = lambda articles: [
-            "test_media_id"
-        ] * len(articles)
+        # 与 WxClient 一致：每个草稿返回一个 media_id 字符串
+        client.upload_article_draft.return_value = "test_media_id"
         client.upload_image.return_value = ("test_media_id", "test_url")
         yield client
 
@@ -249,8 +241,7 @@ This is a test article.
 
     # 测试场景1：所有文章都是新的
     media_ids = wx_publisher.publish_multi_articles(articles)
-    assert len(media_ids) == 3
-    assert all(media_id == "test_media_id" for media_id in media_ids)
+    assert media_ids == ["test_media_id"]  # 三篇文章组成一个草稿
 
     # 验证缓存更新
     for article in articles:
@@ -286,8 +277,44 @@ This is a new article.
     ]
 
     media_ids = wx_publisher.publish_multi_articles(mixed_articles)
-    assert len(media_ids) == 1  # 只有新文章被发布
-    assert media_ids[0] == "test_media_id"
+    assert media_ids == ["test_media_id"]  # 只有新文章被发布
+    assert wx_publisher.client.upload_article_draft.call_args.args[0][0][
+        "title"] == "New Article"
 
     # 验证客户端调用
     assert wx_publisher.client.upload_article_draft.call_count == 2  # 应该被调用两次
+
+
+def test_publish_multi_articles_batches_drafts(wx_publisher, temp_test_dir):
+    """Test that articles are uploaded in batches of at most 8 per request"""
+    md_files = []
+    for i in range(10):
+        name = f"article_{i}.md"
+        with open(os.path.join(temp_test_dir, name), "w", encoding="utf-8") as f:
+            f.write(
+                f"""+++
+title= "Article {i}"
+author= "Test Author"
+subtitle= "Test Digest"
+date= "2024-03-27"
+draft="false"
++++
+
+# Article {i}
+This is article {i}.
+"""
+            )
+        md_files.append(MarkdownFile(source_dir=temp_test_dir, md_file_name=name))
+
+    client = wx_publisher.client
+    client.upload_article_draft.side_effect = ["draft_1", "draft_2"]
+
+    media_ids = wx_publisher.publish_multi_articles(md_files)
+
+    assert media_ids == ["draft_1", "draft_2"]
+    batch_sizes = [len(call.args[0]) for call in
+                   client.upload_article_draft.call_args_list]
+    assert batch_sizes == [8, 2]
+    # 同一批的文章都记录该批草稿的 media_id
+    assert [wx_publisher.cache.get(md_file.abs_path)[0]
+            for md_file in md_files] == ["draft_1"] * 8 + ["draft_2"] * 2
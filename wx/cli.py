@@ -7,11 +7,14 @@
 import os
 from pathlib import Path
 import argparse
-from typing import Optional, List, Dict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Optional, List
 from .wx_cache import WxCache
 from .wx_publisher import WxPublisher
 from .wx_htmler import WxHtmler
 from .md_file import MarkdownFile
+from .path_cache import existence_cache
 from .error_handler import (
     error_handler,
     FileSystemError,
@@ -22,6 +25,17 @@ from .error_handler import (
     RetryStrategy
 )
 
+# 扫描 markdown 文件以 I/O 为主，线程数按 CPU 数放大，但设置上限
+MAX_SCAN_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+
+
+@dataclass(slots=True)
+class MissingImages:
+    """单个markdown文件中缺失的本地图片"""
+
+    filename: str  # markdown 文件名
+    missing_images: List[str]  # 缺失图片在文中的引用路径
+
 
 def create_wx_objects(
     root_dir: Optional[str] = None,
@@ -39,40 +53,70 @@ def create_wx_objects(
     return cache, publisher, htmler
 
 
-def check_missing_images(source_dir: str) -> List[Dict[str, List[str]]]:
-    """检查目录下所有markdown文件中的缺失图片
+def _find_markdown_files(source_dir: str) -> List[str]:
+    """递归列出目录下所有 markdown 文件的路径
+
+    直接使用 os.walk 的字符串结果，不为每个目录项构造 Path 对象。
+    """
+    return [
+        os.path.join(dirpath, name)
+        for dirpath, _, filenames in os.walk(source_dir)
+        for name in filenames
+        if name.endswith(".md")
+    ]
+
+
+def _scan_one(source_dir: str, path: str) -> Optional[MissingImages]:
+    """检查单个markdown文件中的缺失图片
 
     Args:
         source_dir: 源文件目录
+        path: markdown 文件路径
 
     Returns:
-        List[Dict[str, List[str]]]: 包含缺失图片信息的列表，每个元素是一个字典，
-        包含 filename 和 missing_images 两个键
+        Optional[MissingImages]: 有缺失的本地图片时返回缺失信息，否则返回 None
     """
-    result = []
-    pathlist = Path(source_dir).glob("**/*.md")
+    try:
+        # 提取并验证markdown文件
+        filename = os.path.basename(path)
+        md_file = MarkdownFile.extract(source_dir, filename)
+
+        # 获取缺失的本地图片
+        broken_links = md_file.find_broken_img_links()
+        if broken_links:
+            # 只收集本地图片的url_in_text
+            missing_images = [
+                img.url_in_text for img in broken_links if not img.external]
+            if missing_images:
+                return MissingImages(filename, missing_images)
+    except Exception as e:
+        print(f"Failed to process {path}: {e}")
+    return None
 
-    for path in pathlist:
-        try:
-            # 提取并验证markdown文件
-            md_file = MarkdownFile.extract(source_dir, path.name)
-
-            # 获取缺失的本地图片
-            broken_links = md_file.find_broken_img_links()
-            if broken_links:
-                # 只收集本地图片的url_in_text
-                missing_images = [
-                    img.url_in_text for img in broken_links if not img.external]
-                if missing_images:
-                    result.append({
-                        "filename": path.name,
-                        "missing_images": missing_images
-                    })
-        except Exception as e:
-            print(f"Failed to process {path}: {e}")
-            continue
 
-    return result
+# 多篇文章可能引用同一张图片，扫描期间缓存文件存在性检查
+@existence_cache()
+def check_missing_images(source_dir: str) -> List[MissingImages]:
+    """检查目录下所有markdown文件中的缺失图片
+
+    文件读取和图片检查以 I/O 为主，使用线程池并行扫描，结果保持文件遍历顺序。
+
+    Args:
+        source_dir: 源文件目录
+
+    Returns:
+        List[MissingImages]: 包含缺失图片信息的列表，每个元素对应一个文件
+    """
+    source_dir = os.fspath(source_dir)
+    pathlist = _find_markdown_files(source_dir)
+    if not pathlist:
+        return []
+
+    workers = min(MAX_SCAN_WORKERS, len(pathlist))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        scanned = executor.map(
+            lambda path: _scan_one(source_dir, path), pathlist)
+        return [item for item in scanned if item is not None]
 
 
 def gen_and_upload(source_dir: str, path: Path, publisher: WxPublisher) -> bool:
@@ -132,7 +176,42 @@ def gen_and_upload(source_dir: str, path: Path, publisher: WxPublisher) -> bool:
         return False
 
 
+def _extract_for_publish(source_dir: str, path: str,
+                         cache: WxCache) -> Optional[MarkdownFile]:
+    """提取并验证待发布的单个markdown文件
+
+    Args:
+        source_dir: 源文件目录
+        path: markdown 文件路径
+        cache: 已发布文章的缓存
+
+    Returns:
+        Optional[MarkdownFile]: 文件有效时返回提取结果；已发布或出错时返回 None
+    """
+    filename = os.path.basename(path)
+    try:
+        # 缓存以文件内容摘要为键，文件修改后自然不再命中；
+        # 已发布的文章无需解析，与 MarkdownFile.abs_path 使用相同的路径
+        if cache.get(os.path.abspath(os.path.join(source_dir, filename))):
+            error_handler.logger.info(f"Skipping published article: {path}")
+            return None
+        # 提取并验证markdown文件
+        md_file = MarkdownFile.extract(source_dir, filename)
+        # 检查缺失图片
+        broken_links = md_file.find_broken_img_links()
+        if broken_links:
+            raise ImageError(
+                f"Found {len(broken_links)} missing images in {filename}",
+                ErrorLevel.ERROR
+            )
+        return md_file
+    except Exception as e:
+        error_handler.handle_error(e, {"file": path})
+        return None
+
+
 @error_handler.retry(max_retries=3, strategy=RetryStrategy.LINEAR_BACKOFF)
+@existence_cache()
 def post_articles(source_dir: str) -> bool:
     """发布目录下的所有markdown文件到微信公众号
 
@@ -151,29 +230,18 @@ def post_articles(source_dir: str) -> bool:
         # 创建微信相关对象
         _, publisher, _ = create_wx_objects(source_dir)
 
-        # 收集所有 markdown 文件
+        # 收集所有 markdown 文件；提取以 I/O 为主，使用线程池并行，保持遍历顺序
+        pathlist = _find_markdown_files(source_dir)
         md_files = []
-        pathlist = Path(source_dir).glob("**/*.md")
-
-        for path in pathlist:
-            try:
-                # 提取并验证markdown文件
-                md_file = MarkdownFile.extract(source_dir, path.name)
-                # 检查缺失图片
-                broken_links = md_file.find_broken_img_links()
-                if broken_links:
-                    error_details = {
-                        "file": path.name,
-                        "missing_images": [img.url_in_text for img in broken_links]
-                    }
-                    raise ImageError(
-                        f"Found {len(broken_links)} missing images in {path.name}",
-                        ErrorLevel.ERROR
-                    )
-                md_files.append(md_file)
-            except Exception as e:
-                error_handler.handle_error(e, {"file": str(path)})
-                continue
+        if pathlist:
+            workers = min(MAX_SCAN_WORKERS, len(pathlist))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                extracted = executor.map(
+                    lambda path: _extract_for_publish(
+                        source_dir, path, publisher.cache),
+                    pathlist)
+                md_files = [md_file for md_file in extracted
+                            if md_file is not None]
 
         if not md_files:
             raise ValidationError(
@@ -187,7 +255,7 @@ def post_articles(source_dir: str) -> bool:
             raise APIError("Failed to publish any articles", ErrorLevel.ERROR)
 
         error_handler.logger.info(
-            f"Successfully published {len(media_ids)} articles")
+            f"Successfully published {len(media_ids)} drafts")
         return True
 
     except Exception as e:
@@ -293,9 +361,9 @@ def main() -> int:
         if missing_images:
             print("\n发现缺失的图片：")
             for item in missing_images:
-                print(f"\n文件：{item['filename']}")
+                print(f"\n文件：{item.filename}")
                 print("缺失的图片：")
-                for img in item["missing_images"]:
+                for img in item.missing_images:
                     print(f"  - {img}")
             return 1
         else:
@@ -1,12 +1,28 @@
+import re
+
+# The start of a code fence ("```...") or front matter ("---") delimiter line,
+# matched from the newline that ends the previous line
+_DELIMITER_RE = re.compile(r"\n[^\S\n]*(?:```|---[^\S\n]*(?=\n|\Z))")
+# A newline followed by two or more whitespace-only lines; group 1 runs up to
+# the end of the first of them
+_BLANK_RUN_RE = re.compile(r"(\n[^\S\n]*\n)(?:[^\S\n]*(?:\n|\Z))+")
+# Line boundaries str.splitlines honours besides "\n"; the regexes above do not
+_OTHER_LINE_BREAK_RE = re.compile("[\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029]")
+
+
+def _keep_first_blank_line(match: re.Match) -> str:
+    # A callable replacement is cheaper than expanding a "\1" template
+    return match.group(1)
+
+
 class EmptyLineProcessor:
     """Process empty lines in Markdown content while preserving semantic structure."""
 
-    def __init__(self):
-        """Initialize the EmptyLineProcessor."""
-        self.in_code_block = False
-        self.in_front_matter = False
-        self.code_block_marker = "```"
-        self.front_matter_marker = "---"
+    # Processing state lives in locals, so instances carry no attributes
+    __slots__ = ()
+
+    code_block_marker = "```"
+    front_matter_marker = "---"
 
     def is_code_block_delimiter(self, line: str) -> bool:
         """Check if the line is a code block delimiter."""
@@ -41,6 +57,59 @@ class EmptyLineProcessor:
         if not content:
             return "\n"
 
+        if _OTHER_LINE_BREAK_RE.search(content):
+            content = self._process_lines(content)
+        else:
+            content = self._process_regex(content)
+
+        # Ensure content ends with a single newline
+        if not content.endswith("\n"):
+            content += "\n"
+        return content
+
+    def _process_regex(self, content: str) -> str:
+        """Collapse blank-line runs with regexes; content must only use "\n" breaks.
+
+        Delimiter lines split the content into segments. Only segments outside
+        code blocks and front matter have their blank-line runs collapsed.
+        """
+        # Every line, the first included, now follows a "\n", which lets the
+        # patterns start with a literal that the regex engine scans for quickly
+        content = "\n" + content
+        result = []
+        pos = 0
+        in_front_matter = False
+        in_code_block = False
+
+        for match in _DELIMITER_RE.finditer(content):
+            line_start = match.start() + 1
+            self._append_segment(result, content[pos:line_start],
+                                 in_code_block or in_front_matter)
+            line_end = content.find("\n", match.end())
+            if line_end < 0:
+                line_end = len(content)
+            line = content[line_start:line_end]
+            result.append(line)
+            if self.is_code_block_delimiter(line):
+                in_code_block = not in_code_block
+            else:
+                in_front_matter = not in_front_matter
+            pos = line_end
+
+        self._append_segment(result, content[pos:],
+                             in_code_block or in_front_matter)
+        return "".join(result)[1:]
+
+    @staticmethod
+    def _append_segment(result: list, segment: str, protected: bool) -> None:
+        """Append a segment between delimiter lines, collapsing it if unprotected."""
+        if protected:
+            result.append(segment)
+        else:
+            result.append(_BLANK_RUN_RE.sub(_keep_first_blank_line, segment))
+
+    def _process_lines(self, content: str) -> str:
+        """Collapse blank-line runs line by line, for any line break style."""
         # Split content into lines, preserving line endings
         lines = content.splitlines(keepends=True)
 
@@ -95,8 +164,4 @@ class EmptyLineProcessor:
 
             prev_list_item = is_list_item
 
-        # Ensure content ends with a single newline
-        content = "".join(result)
-        if not content.endswith("\n"):
-            content += "\n"
-        return content
+        return "".join(result)
@@ -1,12 +1,14 @@
+import io
 import logging
 import re
 import json
 import os
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterable, List, Optional, Tuple
 from dataclasses import dataclass, field
 from .empty_line_processor import EmptyLineProcessor
 from .hugo_image_processor import HugoImageProcessor
+from .path_cache import existence_cache, path_exists
 
 
 @dataclass
@@ -33,8 +35,13 @@ class HugoProcessor:
 
     # Front matter patterns
     FRONT_MATTER_START = "---"
-    KEY_VALUE_PATTERN = re.compile(r'^(\w+)=["\'](.*)["\']$')
-    KEY_COLON_PATTERN = re.compile(r'^(\w+):\s*(.*)$')
+    # Line forms returned by _tokenize_front_matter_line
+    KEY_VALUE_FORM = "key_value"  # key="value" or key='value'
+    KEY_COLON_FORM = "key_colon"  # key: value
+    # Config keys every processor needs
+    REQUIRED_CONFIG_KEYS = ('source_dir', 'target_dir', 'image_dir')
+    # 文档必需的 front matter 字段，可以根据需要添加更多必需字段
+    REQUIRED_FRONT_MATTER_KEYS = frozenset({'title'})
 
     def __init__(self, config: Dict[str, Any]):
         """
@@ -71,15 +78,14 @@ class HugoProcessor:
             ValueError: If configuration is invalid
         """
         # Check required keys
-        required_keys = ['source_dir', 'target_dir', 'image_dir']
-        missing_keys = [key for key in required_keys if key not in config]
+        missing_keys = [key for key in self.REQUIRED_CONFIG_KEYS
+                        if key not in config]
         if missing_keys:
             raise ValueError(f"Missing required config keys: {missing_keys}")
 
-        # Validate paths
-        for key in required_keys:
-            path = config[key]
-            if not path:
+        # Validate paths (plain truthiness checks, no filesystem access)
+        for key in self.REQUIRED_CONFIG_KEYS:
+            if not config[key]:
                 raise ValueError(f"Invalid path: {key} cannot be empty")
 
         return config
@@ -135,39 +141,38 @@ class HugoProcessor:
             List of format violations found in the file
         """
         violations = []
-        content = markdown_file.read_text()
-        lines = content.splitlines()
 
-        # Check for front matter
-        if not content.startswith(self.FRONT_MATTER_START):
-            return [FormatViolation(
-                line_number=1,
-                message="Missing front matter",
-                line_content=lines[0] if lines else ""
-            )]
+        # Only the front matter is checked, so stop reading at its closing fence
+        with open(markdown_file, "r", encoding="utf-8") as f:
+            first_line = f.readline().rstrip("\r\n")
 
-        # Find front matter end
-        front_matter_end = -1
-        for i, line in enumerate(lines[1:], 1):
-            if line == self.FRONT_MATTER_START:
-                front_matter_end = i
-                break
+            # Check for front matter
+            if not first_line.startswith(self.FRONT_MATTER_START):
+                return [FormatViolation(
+                    line_number=1,
+                    message="Missing front matter",
+                    line_content=first_line
+                )]
 
-        if front_matter_end == -1:
+            front_matter_lines = self._read_front_matter(f)
+
+        if front_matter_lines is None:
             return [FormatViolation(
                 line_number=1,
                 message="Incomplete front matter: missing closing '---'",
-                line_content=lines[0]
+                line_content=first_line
             )]
 
         # Check front matter format
-        for i, line in enumerate(lines[1:front_matter_end], 1):
+        for i, line in enumerate(front_matter_lines, 1):
             line = line.strip()
             if not line:
                 continue
 
+            form, _ = self._tokenize_front_matter_line(line)
+
             # Check if line uses key: value format
-            if self.KEY_COLON_PATTERN.match(line):
+            if form == self.KEY_COLON_FORM:
                 violations.append(FormatViolation(
                     line_number=i + 1,
                     message=f"Mixed format detected: '{line}' should use key=\"value\" format",
@@ -176,7 +181,7 @@ class HugoProcessor:
                 continue
 
             # Check if line uses key="value" format
-            if not self.KEY_VALUE_PATTERN.match(line):
+            if form != self.KEY_VALUE_FORM:
                 violations.append(FormatViolation(
                     line_number=i + 1,
                     message=f"Invalid format: '{line}' should use key=\"value\" format",
@@ -185,6 +190,59 @@ class HugoProcessor:
 
         return violations
 
+    @staticmethod
+    def _is_front_matter_key(key: str) -> bool:
+        """Whether key is a non-empty run of word characters (regex ``\\w+``)."""
+        return key.replace("_", "a").isalnum()
+
+    def _tokenize_front_matter_line(self, line: str) -> Tuple[Optional[str], str]:
+        """
+        Classify a stripped front matter line using plain string scans.
+
+        Recognises exactly two shapes: ``key="value"`` (single or double
+        quotes) and ``key: value``, where key is made of word characters.
+
+        Args:
+            line: A stripped, non-empty front matter line
+
+        Returns:
+            Tuple of (form, key); form is KEY_VALUE_FORM, KEY_COLON_FORM or
+            None when the line matches neither shape, in which case key is ""
+        """
+        colon = line.find(":")
+        if colon > 0 and self._is_front_matter_key(line[:colon]):
+            return self.KEY_COLON_FORM, line[:colon]
+
+        eq = line.find("=")
+        if eq > 0 and self._is_front_matter_key(line[:eq]):
+            value = line[eq + 1:]
+            if len(value) >= 2 and value[0] in "\"'" and value[-1] in "\"'":
+                return self.KEY_VALUE_FORM, line[:eq]
+
+        return None, ""
+
+    def _read_front_matter(self, lines: Iterable[str]) -> Optional[List[str]]:
+        """
+        Consume lines up to and including the closing front matter fence.
+
+        The opening fence must already have been consumed; nothing after the
+        closing fence is read.
+
+        Args:
+            lines: Iterator over the remaining lines of the document
+
+        Returns:
+            The front matter lines without line endings, or None if the
+            closing fence is missing
+        """
+        front_matter_lines = []
+        for line in lines:
+            line = line.rstrip("\r\n")
+            if line == self.FRONT_MATTER_START:
+                return front_matter_lines
+            front_matter_lines.append(line)
+        return None
+
     def standardize_format(self, content: str | Path) -> str:
         """
         Standardize the format of markdown content to use key="value" format.
@@ -368,6 +426,9 @@ class HugoProcessor:
         # Write target file
         target_file.write_text(content)
 
+    # Articles often share images; memoize source image existence checks
+    # made by validate_document for the whole run
+    @existence_cache()
     def publish(self, files: List[str | Path] | None = None) -> Dict[str, Any]:
         """
         Publish markdown files to Hugo directory.
@@ -705,9 +766,10 @@ class HugoProcessor:
 
             # 检查图片引用
             image_refs = self.image_processor.extract_image_references(content)
+            md_dir = os.path.dirname(os.path.abspath(file_path))
             for ref in image_refs:
-                img_path = Path(file_path).parent / ref.path
-                if not img_path.exists():
+                img_path = os.path.abspath(os.path.join(md_dir, ref.path))
+                if not path_exists(img_path):
                     result.missing_images.append(ref.path)
 
             if result.missing_images:
@@ -716,19 +778,13 @@ class HugoProcessor:
                     f"Document contains missing images: {', '.join(result.missing_images)}")
 
             # 检查 front matter
-            required_front_matter = ['title']  # 可以根据需要添加更多必需字段
-
-            # 提取 front matter
+            # 提取 front matter，只读取到结束分隔符为止
             if content.startswith(self.FRONT_MATTER_START):
-                lines = content.splitlines()
-                front_matter_end = -1
-                for i, line in enumerate(lines[1:], 1):
-                    if line == self.FRONT_MATTER_START:
-                        front_matter_end = i
-                        break
-
-                if front_matter_end != -1:
-                    front_matter_lines = lines[1:front_matter_end]
+                lines = io.StringIO(content)
+                next(lines)
+                front_matter_lines = self._read_front_matter(lines)
+
+                if front_matter_lines is not None:
                     found_keys = set()
 
                     for line in front_matter_lines:
@@ -737,17 +793,13 @@ class HugoProcessor:
                             continue
 
                         # 检查两种格式
-                        key_value_match = self.KEY_VALUE_PATTERN.match(line)
-                        key_colon_match = self.KEY_COLON_PATTERN.match(line)
-
-                        if key_value_match:
-                            found_keys.add(key_value_match.group(1))
-                        elif key_colon_match:
-                            found_keys.add(key_colon_match.group(1))
+                        form, key = self._tokenize_front_matter_line(line)
+                        if form is not None:
+                            found_keys.add(key)
 
                     # 检查必需字段
-                    missing_keys = [
-                        key for key in required_front_matter if key not in found_keys]
+                    missing_keys = sorted(
+                        self.REQUIRED_FRONT_MATTER_KEYS.difference(found_keys))
                     if missing_keys:
                         result.is_valid = False
                         result.incomplete_front_matter.extend(missing_keys)
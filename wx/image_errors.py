@@ -2,7 +2,44 @@ import re
 import requests
 from pathlib import Path
 from typing import Union
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+VALID_IMAGE_EXTENSIONS = frozenset(
+    {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg'})
+
+# Schemes that mark an image reference as a URL rather than a local path
+URL_PREFIXES = ('http://', 'https://', 'ftp://')
+
+# Streaming download sizes: read 64 KiB per chunk, buffer writes in 1 MiB
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+WRITE_BUFFER_SIZE = 1024 * 1024
+
+# (connect, read) timeouts in seconds for image downloads
+DOWNLOAD_TIMEOUT = (5, 30)
+
+# Media type (without parameters) -> file extension for downloaded images
+CONTENT_TYPE_EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+    'image/svg+xml': '.svg',
+}
+
+
+def _build_session() -> requests.Session:
+    """Create the session shared by all downloads so connections are reused."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=64,
+                          max_retries=Retry(total=2, backoff_factor=0.2))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+_SESSION = _build_session()
 
 
 class ImageProcessingError(Exception):
@@ -39,11 +76,10 @@ def validate_image_file(path: Path) -> None:
     if not path.exists():
         raise ImageNotFoundError(f"Image file not found: {path}")
 
-    valid_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg'}
-    if path.suffix.lower() not in valid_extensions:
+    if path.suffix.lower() not in VALID_IMAGE_EXTENSIONS:
         raise InvalidImageReferenceError(
             f"Invalid image extension: {path.suffix}. "
-            f"Supported extensions are: {', '.join(valid_extensions)}"
+            f"Supported extensions are: {', '.join(sorted(VALID_IMAGE_EXTENSIONS))}"
         )
 
 
@@ -60,10 +96,10 @@ def validate_image_reference(path: str) -> None:
     if not path:
         raise InvalidImageReferenceError("Empty image path")
 
-    # Check if it's a URL
-    if path.startswith(('http://', 'https://')):
-        parsed = urlparse(path)
-        if not all([parsed.scheme, parsed.netloc]):
+    # Local paths (the common case) only pay for the prefix check; the
+    # prefix already guarantees a scheme, so a URL just needs a host
+    if path.startswith(URL_PREFIXES):
+        if not urlsplit(path).netloc:
             raise InvalidImageReferenceError("Invalid image URL")
 
 
@@ -82,47 +118,44 @@ def download_network_image(url: str, target_dir: Union[str, Path]) -> Path:
         NetworkImageError: If the download fails or content is invalid
     """
     try:
-        response = requests.get(url, timeout=30)
-        response.raise_for_status()
-
-        # Check content type
-        content_type = response.headers.get('content-type', '')
-
-        # Get file extension from content type
-        ext = None
-        if 'image/jpeg' in content_type:
-            ext = '.jpg'
-        elif 'image/png' in content_type:
-            ext = '.png'
-        elif 'image/gif' in content_type:
-            ext = '.gif'
-        elif 'image/webp' in content_type:
-            ext = '.webp'
-        elif 'image/svg+xml' in content_type:
-            ext = '.svg'
-
-        # If content type doesn't indicate an image type, try to get extension from URL
-        if not ext and not content_type.startswith('image/'):
-            ext = Path(urlparse(url).path).suffix
-            if not ext:
-                raise NetworkImageError("Could not determine image extension")
-            # Validate the extension from URL
-            valid_extensions = {'.jpg', '.jpeg',
-                                '.png', '.gif', '.webp', '.svg'}
-            if ext.lower() not in valid_extensions:
-                raise NetworkImageError(f"Invalid image extension: {ext}")
-
-        # Create target directory
-        target_dir = Path(target_dir)
-        target_dir.mkdir(parents=True, exist_ok=True)
-
-        # Generate unique filename
-        filename = re.sub(r'[^a-zA-Z0-9]', '_', url.split('/')[-1])
-        target_path = target_dir / f"{filename}{ext}"
-
-        # Save the image
-        target_path.write_bytes(response.content)
-        return target_path
+        # Stream the body so large images never sit in memory as a whole
+        with _SESSION.get(url, timeout=DOWNLOAD_TIMEOUT, stream=True) as response:
+            response.raise_for_status()
+
+            # Check content type
+            content_type = response.headers.get('content-type', '')
+
+            # Get file extension from content type, ignoring parameters such as charset
+            media_type = content_type.partition(';')[0].strip().lower()
+            ext = CONTENT_TYPE_EXTENSIONS.get(media_type)
+
+            # If content type doesn't indicate an image type, try to get extension from URL
+            if not ext and not content_type.startswith('image/'):
+                ext = Path(urlparse(url).path).suffix
+                if not ext:
+                    raise NetworkImageError(
+                        "Could not determine image extension")
+                # Validate the extension from URL
+                if ext.lower() not in VALID_IMAGE_EXTENSIONS:
+                    raise NetworkImageError(f"Invalid image extension: {ext}")
+
+            # Create target directory
+            target_dir = Path(target_dir)
+            target_dir.mkdir(parents=True, exist_ok=True)
+
+            # Generate unique filename
+            filename = re.sub(r'[^a-zA-Z0-9]', '_', url.split('/')[-1])
+            target_path = target_dir / f"{filename}{ext}"
+
+            # Save the image chunk by chunk; drop partial files on failure
+            try:
+                with open(target_path, 'wb', buffering=WRITE_BUFFER_SIZE) as f:
+                    for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+            except BaseException:
+                target_path.unlink(missing_ok=True)
+                raise
+            return target_path
 
     except requests.RequestException as e:
         raise NetworkImageError(f"Failed to download image: {str(e)}")
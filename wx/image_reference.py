@@ -2,6 +2,23 @@ import re
 from dataclasses import dataclass
 from typing import List
 
+# Single pattern matching both image syntaxes, so the content is scanned once.
+#
+# HTML branch: <img src="path" alt="alt text">
+# This pattern handles:
+# - Both single and double quotes
+# - Optional alt attribute
+# - Alt attribute before or after src
+# - Other attributes between src and alt
+# - Flexible whitespace
+#
+# Markdown branch: ![alt text](path)
+_IMG_RE = re.compile(
+    r'(?P<html><img\s+(?:[^>]*?\s+)?src=(?P<q>["\'])(?P<hpath>.*?)(?P=q)'
+    r'(?:\s+[^>]*?(?:alt=(?P<aq>["\'])(?P<halt>.*?)(?P=aq))?[^>]*)?>)'
+    r'|(?P<md>!\[(?P<alt>.*?)\]\((?P<mdpath>.*?)\))'
+)
+
 
 @dataclass
 class ImageReference:
@@ -24,30 +41,21 @@ def extract_image_references(content: str) -> List[ImageReference]:
     """
     references = []
 
-    # Extract HTML image references first (to avoid confusion with markdown)
-    # Pattern: <img src="path" alt="alt text">
-    # This pattern handles:
-    # - Both single and double quotes
-    # - Optional alt attribute
-    # - Alt attribute before or after src
-    # - Other attributes between src and alt
-    # - Flexible whitespace
-    html_pattern = r'<img\s+(?:[^>]*?\s+)?src=(["\'])(.*?)\1(?:\s+[^>]*?(?:alt=(["\'])(.*?)\3)?[^>]*)?>'
-    for match in re.finditer(html_pattern, content):
-        quote, path, alt_quote, alt_text = match.groups()
-        if path:  # Only add if path is not empty
-            references.append(ImageReference(
-                original_text=match.group(0),
-                path=path,
-                alt_text=alt_text or "",  # Use empty string if alt_text is None
-                is_html=True
-            ))
+    # Matches come back in order of appearance, so no sorting is needed
+    for match in _IMG_RE.finditer(content):
+        if match.lastgroup == 'html':
+            path = match.group('hpath')
+            if path:  # Only add if path is not empty
+                references.append(ImageReference(
+                    original_text=match.group(0),
+                    path=path,
+                    # Use empty string if alt_text is None
+                    alt_text=match.group('halt') or "",
+                    is_html=True
+                ))
+            continue
 
-    # Extract markdown image references
-    # Pattern: ![alt text](path)
-    markdown_pattern = r'!\[(.*?)\]\((.*?)\)'
-    for match in re.finditer(markdown_pattern, content):
-        alt_text, path = match.groups()
+        path = match.group('mdpath')
         if path:  # Only add if path is not empty
             # Check if this isn't part of an HTML tag
             start_pos = match.start()
@@ -57,11 +65,8 @@ def extract_image_references(content: str) -> List[ImageReference]:
                 references.append(ImageReference(
                     original_text=match.group(0),
                     path=path,
-                    alt_text=alt_text,
+                    alt_text=match.group('alt'),
                     is_html=False
                 ))
 
-    # Sort references by their appearance in the text
-    references.sort(key=lambda r: content.find(r.original_text))
-
     return references
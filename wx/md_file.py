@@ -1,11 +1,15 @@
 from dataclasses import dataclass
 from dataclasses import dataclass, field
 import os
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from typing import Dict, Optional, List, Tuple
 import re
 import urllib.request
 import time
 import shutil
+from contextlib import nullcontext
+import requests
 from .error_handler import (
     error_handler,
     FileSystemError,
@@ -13,6 +17,24 @@ from .error_handler import (
     ErrorLevel,
     RetryStrategy
 )
+from .path_cache import existence_cache, path_exists
+
+# 微信文章头部：文件开头由 +++ 包围的 TOML front matter
+HEADER_FENCE = "+++"
+# 正文中的 markdown 图片链接 ![alt](url)
+MD_IMAGE_LINK_RE = re.compile(r"\!\[.*?\]\((.*?)\)")
+# 以这些前缀开头的是网络图片，需要下载后再上传
+EXTERNAL_IMAGE_PREFIXES = ("http://", "https://")
+# 协议相对地址和内联 data URI 既不下载也不是本地文件，不必检查文件系统，
+# 与缺失的本地图片一样使用占位图
+NON_FILE_IMAGE_PREFIXES = ("//", "data:")
+# 网络图片并行下载的线程数上限和超时（秒）
+MAX_DOWNLOAD_WORKERS = 8
+DOWNLOAD_TIMEOUT = 10
+# 流式写盘的块大小，图片不必整体读入内存
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# 正文图片达到该数量时，按目录 scandir 一次代替逐个 stat
+DIR_SCAN_MIN_IMAGES = 4
 
 
 @dataclass
@@ -75,39 +97,49 @@ class MarkdownBody:
     """Markdown body information class for storing body content"""
 
     body_text: str = ""
-    __image_Refs: List[ImageReference] = field(default_factory=list)
+    __image_Refs: Optional[List[ImageReference]] = None
 
     def __init__(self, source_dir: str, body_text: str):
         self.source_dir = source_dir
         self.body_text = body_text
-        self.__image_Refs = []  # Initialize as an empty list
+        self.__image_Refs = None  # None until the body has been scanned
         self.get_imgRefs()
 
     def get_imgRefs(self) -> List[ImageReference]:
-        if self.__image_Refs:
+        # 正文只扫描一次；没有图片的正文也不会被重复扫描
+        if self.__image_Refs is not None:
             return self.__image_Refs
-        img_links = re.findall(r"\!\[.*?\]\((.*?)\)", self.body_text)
-        for link in img_links:
-            img_existed = False
-            local_path = ""
-            external = link.startswith("http")
-            if not external:
-                local_path = os.path.abspath(
-                    os.path.join(self.source_dir, link.lstrip("./"))
-                )
-                if os.path.exists(local_path):
-                    img_existed = True
-                else:
-                    img_existed = False
-            self.__image_Refs.append(
-                ImageReference(
-                    url_in_text=link,
-                    original_path=local_path,
-                    existed=img_existed,
-                    external=external,
+        image_refs = []
+        links = MD_IMAGE_LINK_RE.findall(self.body_text)
+        # abspath 对相对路径要调用 getcwd；每次扫描只做一次，之后只需 normpath
+        abs_source = os.path.abspath(self.source_dir)
+        # 图片通常集中在少数几个目录里；已在扫描作用域内时共享外层缓存
+        scope = (existence_cache() if len(links) >= DIR_SCAN_MIN_IMAGES
+                 else nullcontext())
+        with scope:
+            for link in links:
+                img_existed = False
+                local_path = ""
+                lowered = link.lower()
+                external = lowered.startswith(EXTERNAL_IMAGE_PREFIXES)
+                if not external and not lowered.startswith(NON_FILE_IMAGE_PREFIXES):
+                    local_path = os.path.normpath(
+                        os.path.join(abs_source, link.lstrip("./"))
+                    )
+                    if path_exists(local_path):
+                        img_existed = True
+                    else:
+                        img_existed = False
+                image_refs.append(
+                    ImageReference(
+                        url_in_text=link,
+                        original_path=local_path,
+                        existed=img_existed,
+                        external=external,
+                    )
                 )
-            )
-        return self.__image_Refs
+        self.__image_Refs = image_refs
+        return image_refs
 
 
 @dataclass
@@ -141,15 +173,18 @@ class MarkdownHeader:
         if not self.banner:
             self.banner = "https://picsum.photos/900/300"
 
-        if self.banner.startswith("http"):  # 如果banner是网络图片，则设置external为True
+        banner_path = os.path.abspath(
+            os.path.join(self.source_dir, self.banner))
+        banner = self.banner.lower()
+        if banner.startswith(EXTERNAL_IMAGE_PREFIXES):  # 如果banner是网络图片，则设置external为True
             external = True
         # 如果banner是本地图片，则设置banner_existed为True
-        elif os.path.exists(os.path.join(self.source_dir, self.banner)):
+        elif (not banner.startswith(NON_FILE_IMAGE_PREFIXES)
+              and path_exists(banner_path)):
             banner_existed = True
         self.banner_imgRef = ImageReference(
             url_in_text=self.banner,
-            original_path=os.path.abspath(
-                os.path.join(self.source_dir, self.banner)),
+            original_path=banner_path,
             existed=banner_existed,
             external=external,
         )
@@ -168,9 +203,9 @@ class MarkdownHeader:
             if not line or line == "+++":
                 continue
 
-            # Match one field per line
-            if "=" in line:
-                key, value = line.split("=", 1)
+            # Match one field per line; partition scans the line only once
+            key, sep, value = line.partition("=")
+            if sep:
                 key = key.strip()
                 value = value.strip().strip('"')
 
@@ -235,10 +270,8 @@ class MarkdownFile:
     def __init__(self, source_dir: str, md_file_name: str):
         self.source_dir = source_dir
         md_file_path = os.path.abspath(os.path.join(source_dir, md_file_name))
-        if not os.path.exists(md_file_path):
-            raise FileNotFoundError(f"File not found: {md_file_path}")
         self.base_name = os.path.basename(md_file_path)
-        self.abs_path = os.path.abspath(md_file_path)
+        self.abs_path = md_file_path
         self.image_pairs = []  # Initialize as an empty list
         self.uploaded_images = {}  # Initialize as an empty dict
         self.__load_content()
@@ -253,34 +286,44 @@ class MarkdownFile:
             raise ValueError("No image links found in the header and body")
         return self.image_pairs
 
-    def __extract_header_and_body(self, content: str) -> Tuple[str, str]:
-        self.image_pairs = []
-        wechat_match = re.search(r"^\+\+\+(.*?)\+\+\+", content, re.DOTALL)
-        if not wechat_match:
+    @staticmethod
+    def split_header_and_body(content: str) -> Tuple[str, str]:
+        """Split content into the +++ header text and the body text"""
+        # 头部必须从文件开头开始，到下一个 +++ 为止；用字符串查找代替正则
+        header_end = -1
+        if content.startswith(HEADER_FENCE):
+            header_end = content.find(HEADER_FENCE, len(HEADER_FENCE))
+        if header_end == -1:
             raise ValueError("No header found in the content")
-        header_text = wechat_match.group(1).strip()
+        header_text = content[len(HEADER_FENCE):header_end].strip()
+        body_text = content[header_end + len(HEADER_FENCE):].strip()
+        return header_text, body_text
+
+    def __extract_header_and_body(self, content: str) -> None:
+        self.image_pairs = []
+        header_text, body_text = MarkdownFile.split_header_and_body(content)
         self.header = MarkdownHeader.extract_header(
             self.source_dir, header_text)
-
-        body_text = content[wechat_match.end():].strip()
         self.body = MarkdownBody(self.source_dir, body_text)
         self.image_pairs = self.get_imgRefs()
 
     def __load_content(self):
-        # Read content from file if not provided
-        with open(self.abs_path, "r", encoding="utf-8") as f:
-            content = f.read()
+        # Read content from file; open() doubles as the existence check
+        try:
+            with open(self.abs_path, "r", encoding="utf-8") as f:
+                content = f.read()
+        except FileNotFoundError:
+            raise FileNotFoundError(f"File not found: {self.abs_path}") from None
         self.content = content
         self.__extract_header_and_body(content)
         return self
 
     def find_broken_img_links(self) -> List[ImageReference]:
-        ret = []
         if not self.image_pairs:  # Ensure image_pairs is initialized and not empty
             self.get_imgRefs()  # Populate image_pairs if empty
-        for imgRef in self.image_pairs:
-            if not imgRef.external and not imgRef.existed:
-                ret.append(imgRef)
+        # existed 在解析时已确定，这里不再访问文件系统
+        ret = [imgRef for imgRef in self.image_pairs
+               if not imgRef.external and not imgRef.existed]
         if not ret:
             return []
         print("以下图片未找到:")
@@ -294,59 +337,41 @@ class MarkdownFile:
         file = MarkdownFile(source_dir, file_path)
         return file
 
-    def download_image_from_web(self):
+    def download_image_from_web(self, max_workers: int = MAX_DOWNLOAD_WORKERS):
         """Download image from web and save to assets directory"""
         imgRefs = [imgRef for imgRef in self.image_pairs if imgRef.external]
-        download_errors = []
-
-        for imgRef in imgRefs:
-            try:
-                # Create assets directory if it doesn't exist
-                assets_dir = os.path.join(self.source_dir, "assets")
-                try:
-                    os.makedirs(assets_dir, exist_ok=True)
-                except Exception as e:
-                    raise FileSystemError(
-                        f"Failed to create assets directory: {str(e)}")
+        if not imgRefs:
+            return
 
-                try:
-                    resource = urllib.request.urlopen(imgRef.url_in_text)
-                    content = resource.read()
-                except Exception as e:
-                    raise ImageError(
-                        f"Failed to download image from {imgRef.url_in_text}: {str(e)}")
-
-                if content:
-                    imgRef.existed = True
-                    # Get file extension from URL or default to .png
-                    file_ext = os.path.splitext(
-                        imgRef.url_in_text.split("/")[-1])[1]
-                    if not file_ext:
-                        file_ext = ".png"
-
-                    # Generate a unique filename using timestamp
-                    timestamp = int(time.time())
-                    name = f"image_{timestamp}{file_ext}"
-                    f_name = os.path.join(assets_dir, name)
-
-                    try:
-                        with open(f_name, "wb") as f:
-                            f.write(content)
-                        imgRef.original_path = f_name
-                    except Exception as e:
-                        raise FileSystemError(
-                            f"Failed to save image to {f_name}: {str(e)}")
-                else:
-                    imgRef.existed = False
-                    download_errors.append(imgRef.url_in_text)
+        # Create assets directory if it doesn't exist
+        assets_dir = os.path.join(self.source_dir, "assets")
+        try:
+            os.makedirs(assets_dir, exist_ok=True)
+        except Exception as e:
+            raise FileSystemError(
+                f"Failed to create assets directory: {str(e)}")
 
-            except Exception as e:
-                error_handler.handle_error(e, {
-                    "img_url": imgRef.url_in_text,
-                    "source_dir": self.source_dir
-                })
-                download_errors.append(imgRef.url_in_text)
-                continue
+        # 同一 URL 会写同一个文件，每个 URL 只下载一次，结果同步给所有引用
+        groups: Dict[str, List[ImageReference]] = {}
+        for imgRef in imgRefs:
+            groups.setdefault(imgRef.url_in_text, []).append(imgRef)
+        firsts = [refs[0] for refs in groups.values()]
+
+        # 下载以网络 I/O 为主：并行下载，并复用同一个 Session 的连接
+        workers = min(max_workers, len(firsts))
+        with requests.Session() as session, \
+                ThreadPoolExecutor(max_workers=workers) as executor:
+            downloaded = list(executor.map(
+                lambda imgRef: self.__download_web_image(
+                    session, assets_dir, imgRef),
+                firsts))
+        download_errors = []
+        for refs, ok in zip(groups.values(), downloaded):
+            for imgRef in refs[1:]:
+                imgRef.original_path = refs[0].original_path
+                imgRef.existed = refs[0].existed
+            if not ok:
+                download_errors.extend(imgRef.url_in_text for imgRef in refs)
 
         if download_errors:
             raise ImageError(
@@ -354,6 +379,70 @@ class MarkdownFile:
                 ErrorLevel.WARNING
             )
 
+    def __download_web_image(self, session: requests.Session, assets_dir: str,
+                             imgRef: ImageReference) -> bool:
+        """Download one web image into assets; return whether it succeeded"""
+        try:
+            # Get file extension from URL or default to .png
+            file_ext = os.path.splitext(
+                imgRef.url_in_text.split("/")[-1])[1]
+            if not file_ext:
+                file_ext = ".png"
+
+            # 并行下载时时间戳会重名，改用 URL 的摘要生成文件名
+            digest = hashlib.md5(imgRef.url_in_text.encode("utf-8")).hexdigest()
+            name = f"image_{digest[:16]}{file_ext}"
+            f_name = os.path.join(assets_dir, name)
+
+            # 同一 URL 之前已完整下载过（只有下载完成才会改名），直接复用
+            if os.path.exists(f_name):
+                imgRef.original_path = f_name
+                imgRef.existed = True
+                return True
+
+            # 先写临时文件，下载完整后再改名，失败时不留下半张图片
+            tmp_name = f_name + ".part"
+            try:
+                response = session.get(
+                    imgRef.url_in_text, timeout=DOWNLOAD_TIMEOUT, stream=True)
+            except Exception as e:
+                raise ImageError(
+                    f"Failed to download image from {imgRef.url_in_text}: {str(e)}")
+            try:
+                response.raise_for_status()
+                size = 0
+                with open(tmp_name, "wb") as f:
+                    for chunk in response.iter_content(DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+                        size += len(chunk)
+            except Exception as e:
+                if os.path.exists(tmp_name):
+                    os.remove(tmp_name)
+                # requests 的异常也是 OSError 的子类，需先判断
+                if isinstance(e, requests.RequestException):
+                    raise ImageError(
+                        f"Failed to download image from {imgRef.url_in_text}: {str(e)}")
+                raise FileSystemError(
+                    f"Failed to save image to {f_name}: {str(e)}")
+            finally:
+                response.close()
+
+            if not size:
+                os.remove(tmp_name)
+                imgRef.existed = False
+                return False
+            os.replace(tmp_name, f_name)
+            imgRef.original_path = f_name
+            imgRef.existed = True
+            return True
+
+        except Exception as e:
+            error_handler.handle_error(e, {
+                "img_url": imgRef.url_in_text,
+                "source_dir": self.source_dir
+            })
+            return False
+
     def use_temp_img_for_unavailable_img(self):
         """Use temp image for unavailable image"""
         unavailable_count = 0
@@ -0,0 +1,72 @@
+"""Persistent cache of OpenRouter completions.
+
+Articles are re-processed far more often than they change, so the same
+prompt is sent for the same content again and again. ``LLMCache`` stores
+each completion in a small sqlite database keyed by a digest of the request,
+letting ``OpenRouterService`` answer repeats without an API call.
+"""
+
+import sqlite3
+import threading
+import time
+from typing import Optional
+
+from .error_handler import CacheError
+
+
+class LLMCache:
+    """Completion texts keyed by request digest, stored in sqlite."""
+
+    def __init__(self, path: str, ttl: Optional[int] = None) -> None:
+        """Open (or create) the cache database.
+
+        Args:
+            path: Path of the sqlite database file
+            ttl: Seconds an entry stays valid; None keeps entries forever
+
+        Raises:
+            CacheError: If the database cannot be opened
+        """
+        self.path = path
+        self.ttl = ttl
+        # OpenRouterService fans requests out over threads
+        self._lock = threading.Lock()
+        try:
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache_v1 ("
+                    "key BLOB PRIMARY KEY, value TEXT NOT NULL, "
+                    "created_at INTEGER NOT NULL)")
+        except sqlite3.Error as e:
+            raise CacheError(f"Failed to open LLM cache at {path}: {str(e)}")
+
+    def get(self, key: bytes) -> Optional[str]:
+        """Return the cached completion for ``key``, or None if absent or expired."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM cache_v1 WHERE key = ?",
+                (key,)).fetchone()
+        if row is None:
+            return None
+        value, created_at = row
+        if self.ttl is not None and time.time() - created_at > self.ttl:
+            return None
+        return value
+
+    def set(self, key: bytes, value: str) -> None:
+        """Store the completion ``value`` under ``key``."""
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_v1 (key, value, created_at) "
+                "VALUES (?, ?, ?)", (key, value, int(time.time())))
+
+    def clear(self) -> None:
+        """Drop every cached completion."""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM cache_v1")
+
+    def close(self) -> None:
+        """Close the underlying database connection."""
+        with self._lock:
+            self._conn.close()
@@ -1,14 +1,57 @@
 import os
+import re
+import json
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAI
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
+
+from .openrouter_cache import LLMCache
+
+
+# 并发请求 OpenRouter 的线程数上限，避免触发限流
+MAX_SUMMARY_WORKERS = 8
+
+# 持久化 LLM 缓存的文件名，位于文章源目录下
+LLM_CACHE_FILE = ".llm_cache.sqlite"
+
+# 标题、副标题和分类中去掉的 markdown 符号与引号，换行替换为空格
+_MARKUP_TABLE = str.maketrans({"#": None, "`": None, '"': None, "'": None,
+                               "\n": " "})
+# 关键词中去掉的引号和方括号
+_KEYWORD_TABLE = str.maketrans("", "", "\"'[]")
+# 标签只保留字母、数字和连字符（\w 即 str.isalnum() 加下划线）
+_TAG_DROP_RE = re.compile(r"[^\w-]|_")
+_HYPHEN_RUN_RE = re.compile(r"-{2,}")
+
+# 标题、副标题和 SEO 关键词请求使用的固定系统提示词
+_SYSTEM_PROMPTS = {
+    "title": "你是一个标题生成器。只生成标题，不要其他文本。标题必须是中文，不超过100个字符，并描述主要主题。不要包含任何markdown、引号或额外的格式。",
+    "subtitle": "你是一个副标题生成器。生成一个单句描述（最多50个字符），捕捉文章的精髓。描述必须是中文，以句号结尾，不应包含任何markdown、引号或额外的格式。",
+    "seo": "为给定的文章内容生成SEO关键词。返回最多20个相关的关键词或关键短语。每个关键词/短语应该是1-3个词长。只返回逗号分隔的关键词。关注对搜索引擎优化有价值的中文术语。",
+}
 
 
 class OpenRouterService:
     """Service for interacting with OpenRouter API to enhance content."""
 
-    def __init__(self):
+    # Categories offered to the model before it may suggest a new one
+    PREDEFINED_CATEGORIES = (
+        "个人观点", "实用总结", "方法论",
+        "AI编程", "软件工程", "工程效率",
+        "人工智能"
+    )
+
+    # Model used for every completion
+    MODEL = "deepseek/deepseek-v3-base:free"
+
+    def __init__(self, cache: Optional[LLMCache] = None):
         """Initialize the OpenRouter service.
 
+        Args:
+            cache: Persistent completion cache; defaults to one under
+                CD20_ARTICLE_SOURCE when that directory is set
+
         Raises:
             ValueError: If OPENROUTER_API_KEY environment variable is not set
         """
@@ -25,6 +68,14 @@ class OpenRouterService:
                 "X-Title": "Markdown to WeChat Converter"  # Optional
             }
         )
+        # summarize_all results keyed by a digest of content and categories
+        self._summary_cache: Dict[bytes, Dict[str, Any]] = {}
+
+        if cache is None:
+            root_dir = os.getenv("CD20_ARTICLE_SOURCE")
+            if root_dir and os.path.isdir(root_dir):
+                cache = LLMCache(os.path.join(root_dir, LLM_CACHE_FILE))
+        self.cache = cache
 
     def summarize_for_title(self, content: str) -> str:
         """Generate a title from the article content.
@@ -35,32 +86,16 @@ class OpenRouterService:
         Returns:
             A generated title that highlights key points and attracts readers
         """
-        # Extract content without front matter
-        content_without_front_matter = content.split(
-            "---", 1)[1] if "---" in content else content
-
-        # Clean up the content
-        content_lines = content_without_front_matter.strip().split("\n")
-        # Remove empty lines and clean up markdown headers
-        clean_lines = []
-        for line in content_lines:
-            line = line.strip()
-            if not line:
-                continue
-            # Remove markdown header markers but preserve the text
-            if line.startswith('#'):
-                line = line.lstrip('#').strip()
-            clean_lines.append(line)
+        clean_lines = self._clean_lines(content)
 
         # Take first paragraph (up to 5 lines) for context
         clean_content = " ".join(clean_lines[:5])
 
-        response = self.client.chat.completions.create(
-            model="deepseek/deepseek-v3-base:free",
+        response = self._complete(
             messages=[
                 {
                     "role": "system",
-                    "content": "你是一个标题生成器。只生成标题，不要其他文本。标题必须是中文，不超过100个字符，并描述主要主题。不要包含任何markdown、引号或额外的格式。"
+                    "content": _SYSTEM_PROMPTS["title"]
                 },
                 {
                     "role": "user",
@@ -73,27 +108,8 @@ class OpenRouterService:
             frequency_penalty=0.0  # No need for frequency penalty in short titles
         )
 
-        title = response.choices[0].message.content.strip()
-
-        # Clean up the title
-        title = (title
-                 .replace('#', '')
-                 .replace('`', '')
-                 .replace('"', '')
-                 .replace("'", "")
-                 .replace("\n", " ")  # Replace newlines with spaces
-                 .strip())
-
-        # If title is still too long, truncate it
-        if len(title) > 100:
-            title = title[:97] + "..."
-
-        # If title is empty, use the first non-empty line from the content
-        if not title and clean_lines:
-            title = clean_lines[0][:97] + \
-                "..." if len(clean_lines[0]) > 100 else clean_lines[0]
-
-        return title
+        title = response.strip()
+        return self._clean_title(title, clean_lines)
 
     def summarize_for_subtitle(self, content: str) -> str:
         """Generate a subtitle/description from the article content.
@@ -104,32 +120,16 @@ class OpenRouterService:
         Returns:
             A concise description of the article content in one sentence (max 50 characters)
         """
-        # Extract content without front matter
-        content_without_front_matter = content.split(
-            "---", 1)[1] if "---" in content else content
-
-        # Clean up the content
-        content_lines = content_without_front_matter.strip().split("\n")
-        # Remove empty lines and clean up markdown headers
-        clean_lines = []
-        for line in content_lines:
-            line = line.strip()
-            if not line:
-                continue
-            # Remove markdown header markers but preserve the text
-            if line.startswith('#'):
-                line = line.lstrip('#').strip()
-            clean_lines.append(line)
+        clean_lines = self._clean_lines(content)
 
         # Take first two paragraphs for context
         clean_content = " ".join(clean_lines[:10])
 
-        response = self.client.chat.completions.create(
-            model="deepseek/deepseek-v3-base:free",
+        response = self._complete(
             messages=[
                 {
                     "role": "system",
-                    "content": "你是一个副标题生成器。生成一个单句描述（最多50个字符），捕捉文章的精髓。描述必须是中文，以句号结尾，不应包含任何markdown、引号或额外的格式。"
+                    "content": _SYSTEM_PROMPTS["subtitle"]
                 },
                 {
                     "role": "user",
@@ -142,29 +142,8 @@ class OpenRouterService:
             frequency_penalty=0.0  # No need for frequency penalty in short description
         )
 
-        subtitle = response.choices[0].message.content.strip()
-
-        # Clean up the subtitle
-        subtitle = (subtitle
-                    .replace('#', '')
-                    .replace('`', '')
-                    .replace('"', '')
-                    .replace("'", "")
-                    .replace("\n", " ")  # Replace newlines with spaces
-                    .strip())
-
-        # Remove any existing periods or ellipsis
-        subtitle = subtitle.rstrip('。.…')
-
-        # Process the subtitle
-        if len(subtitle) > 46:
-            # For long subtitles, truncate and add ellipsis
-            # Remove any trailing punctuation
-            subtitle = subtitle[:46].rstrip(',.。!?！？、，')
-            return subtitle + "..."
-        else:
-            # For short subtitles, add period
-            return subtitle + "。"
+        subtitle = response.strip()
+        return self._clean_subtitle(subtitle)
 
     def generate_tags(self, content: str) -> List[str]:
         """
@@ -189,28 +168,7 @@ class OpenRouterService:
         )
 
         response = self._get_response_with_retry(prompt)
-        tags = [tag.strip() for tag in response.split('\n') if tag.strip()][:3]
-
-        # Clean up tags
-        cleaned_tags = []
-        for tag in tags:
-            # Remove any non-alphanumeric characters except hyphens
-            cleaned = ''.join(c for c in tag if c.isalnum() or c == '-')
-            # Remove consecutive hyphens
-            while '--' in cleaned:
-                cleaned = cleaned.replace('--', '-')
-            # Remove leading/trailing hyphens
-            cleaned = cleaned.strip('-')
-            # Convert to lowercase
-            cleaned = cleaned.lower()
-            if cleaned:
-                cleaned_tags.append(cleaned)
-
-        # If we don't have enough tags, add generic ones
-        while len(cleaned_tags) < 3:
-            cleaned_tags.append(f"tag-{len(cleaned_tags)+1}")
-
-        return cleaned_tags[:3]  # Ensure we return exactly 3 tags
+        return self._clean_tags(response.split('\n'))
 
     def suggest_category(self, content: str, existing_categories: List[str] = None) -> str:
         """
@@ -223,29 +181,9 @@ class OpenRouterService:
         Returns:
             A suggested category name
         """
-        # Define predefined categories
-        predefined = [
-            "个人观点", "实用总结", "方法论",
-            "AI编程", "软件工程", "工程效率",
-            "人工智能"
-        ]
+        predefined = self.PREDEFINED_CATEGORIES
 
-        # Extract content without front matter
-        content_without_front_matter = content.split(
-            "---", 1)[1] if "---" in content else content
-
-        # Clean up the content
-        content_lines = content_without_front_matter.strip().split("\n")
-        # Remove empty lines and clean up markdown headers
-        clean_lines = []
-        for line in content_lines:
-            line = line.strip()
-            if not line:
-                continue
-            # Remove markdown header markers but preserve the text
-            if line.startswith('#'):
-                line = line.lstrip('#').strip()
-            clean_lines.append(line)
+        clean_lines = self._clean_lines(content)
 
         # Take first few paragraphs for context
         clean_content = " ".join(clean_lines[:5])
@@ -259,17 +197,8 @@ class OpenRouterService:
                 f"{clean_content}\n\n"
                 "只回复分类名称，不要解释。"
             )
-            category = response.strip()
-            # If no valid category is returned, use the most appropriate existing one
-            if not category or category not in existing_categories:
-                # For Python/programming content, prefer software engineering related categories
-                if any(word in clean_content.lower() for word in ['python', 'programming', 'code', 'software']):
-                    for preferred in ['软件工程', 'AI编程', '工程效率']:
-                        if preferred in existing_categories:
-                            return preferred
-                # Default to the first category if no better match
-                return existing_categories[0]
-            return category
+            return self._pick_existing_category(
+                response.strip(), clean_content, existing_categories)
 
         # Otherwise, try to use predefined categories first
         response = self._get_response_with_retry(
@@ -281,33 +210,7 @@ class OpenRouterService:
             "不要解释或标点。"
         )
 
-        category = response.strip()
-
-        # Validate the category
-        if not category:
-            return "个人观点"  # Default category
-
-        # Clean up the category
-        category = (category
-                    .replace('#', '')
-                    .replace('`', '')
-                    .replace('"', '')
-                    .replace("'", "")
-                    .replace("\n", " ")  # Replace newlines with spaces
-                    .strip())
-
-        # If category is not in predefined list, ensure it's valid
-        if category not in predefined:
-            # Ensure it's not too long
-            words = category.split()
-            if len(words) > 3:
-                category = " ".join(words[:3])
-
-            # Ensure it only contains valid characters
-            category = "".join(c for c in category
-                               if c.isalnum() or c.isspace() or '\u4e00' <= c <= '\u9fff')
-
-        return category.strip()
+        return self._clean_category(response.strip())
 
     def generate_seo_keywords(self, content: str) -> List[str]:
         """Generate SEO-friendly keywords from the article content.
@@ -322,31 +225,16 @@ class OpenRouterService:
         if not content:
             return []
 
-        # Extract content without front matter
-        content_without_front_matter = content.split(
-            "---", 1)[1] if "---" in content else content
-
-        # Clean up the content
-        content_lines = content_without_front_matter.strip().split("\n")
-        clean_lines = []
-        for line in content_lines:
-            line = line.strip()
-            if not line:
-                continue
-            # Remove markdown header markers but preserve the text
-            if line.startswith('#'):
-                line = line.lstrip('#').strip()
-            clean_lines.append(line)
+        clean_lines = self._clean_lines(content)
 
         # Take first few paragraphs for context
         clean_content = " ".join(clean_lines[:10])
 
-        response = self.client.chat.completions.create(
-            model="deepseek/deepseek-v3-base:free",
+        response = self._complete(
             messages=[
                 {
                     "role": "system",
-                    "content": "为给定的文章内容生成SEO关键词。返回最多20个相关的关键词或关键短语。每个关键词/短语应该是1-3个词长。只返回逗号分隔的关键词。关注对搜索引擎优化有价值的中文术语。"
+                    "content": _SYSTEM_PROMPTS["seo"]
                 },
                 {
                     "role": "user",
@@ -358,8 +246,269 @@ class OpenRouterService:
             top_p=0.8        # More focused token selection
         )
 
-        keywords_text = response.choices[0].message.content.strip()
+        keywords_text = response.strip()
+        return self._clean_keywords(keywords_text)
+
+    def summarize_all(self, content: str,
+                      existing_categories: List[str] = None) -> Dict[str, Any]:
+        """Generate title, subtitle, tags, category and SEO keywords in one request.
+
+        One chat completion returns all five fields as a JSON object, which
+        are then cleaned up exactly like the single-purpose methods do.
+        Results are cached per content, so repeated calls cost no API call.
+
+        Args:
+            content: The full article content including front matter
+            existing_categories: Optional list of existing categories to choose from
+
+        Returns:
+            Dict with keys title, subtitle, tags, category and keywords
+
+        Raises:
+            ValueError: If the response does not contain a JSON object
+        """
+        digest = hashlib.blake2b(content.encode("utf-8"))
+        for category in existing_categories or []:
+            digest.update(b"\0" + category.encode("utf-8"))
+        key = digest.digest()
+        cached = self._summary_cache.get(key)
+        if cached is not None:
+            return self._copy_summary(cached)
+
+        clean_lines = self._clean_lines(content)
+        clean_content = " ".join(clean_lines[:10])
+
+        # Same category rules as suggest_category
+        use_existing = bool(existing_categories) and len(existing_categories) >= 10
+        if use_existing:
+            category_rule = (
+                "category：从以下列表中选择一个最合适的分类："
+                f"{', '.join(existing_categories)}")
+        else:
+            category_rule = (
+                "category：从以下列表中选择一个最合适的分类："
+                f"{', '.join(self.PREDEFINED_CATEGORIES)}；"
+                "如果没有合适的分类，建议一个新的分类名称（最多3个词）")
+
+        response = self._complete(
+            messages=[
+                {
+                    "role": "system",
+                    "content": (
+                        "你是一个文章元数据生成器。根据文章内容，只返回一个JSON对象，不要其他文本。"
+                        "JSON包含以下字段：\n"
+                        "title：中文标题，不超过100个字符，描述主要主题\n"
+                        "subtitle：中文单句描述，最多50个字符，以句号结尾\n"
+                        "tags：恰好三个拼音形式的标签数组，只包含字母、数字和连字符，例如：python-web\n"
+                        f"{category_rule}\n"
+                        "keywords：最多20个SEO关键词数组，每个1-3个词，关注中文术语\n"
+                        "字段值不要包含markdown、引号或额外的格式。"
+                    )
+                },
+                {
+                    "role": "user",
+                    "content": clean_content
+                }
+            ],
+            temperature=0.3,  # Lower temperature for more focused output
+            max_tokens=300,   # Room for all five fields
+            top_p=0.8        # More focused token selection
+        )
+
+        fields = self._parse_summary(response)
 
+        tags = fields.get("tags") or []
+        if isinstance(tags, str):
+            tags = tags.replace(",", "\n").split("\n")
+        keywords = fields.get("keywords") or []
+        if not isinstance(keywords, str):
+            keywords = ",".join(str(kw) for kw in keywords)
+
+        category = str(fields.get("category") or "").strip()
+        if use_existing:
+            category = self._pick_existing_category(
+                category, " ".join(clean_lines[:5]), existing_categories)
+        else:
+            category = self._clean_category(category)
+
+        summary = {
+            "title": self._clean_title(
+                str(fields.get("title") or "").strip(), clean_lines),
+            "subtitle": self._clean_subtitle(
+                str(fields.get("subtitle") or "").strip()),
+            "tags": self._clean_tags([str(tag) for tag in tags]),
+            "category": category,
+            "keywords": self._clean_keywords(keywords) if content else [],
+        }
+        self._summary_cache[key] = summary
+        return self._copy_summary(summary)
+
+    def summarize_articles(self, contents: List[str],
+                           existing_categories: List[str] = None,
+                           max_workers: int = MAX_SUMMARY_WORKERS) -> List[Dict[str, Any]]:
+        """Run summarize_all for many articles concurrently.
+
+        The requests are network bound, so they share this service's client
+        across a thread pool; results keep the order of ``contents``.
+
+        Args:
+            contents: Full contents of the articles, front matter included
+            existing_categories: Optional list of existing categories to choose from
+            max_workers: Maximum number of requests in flight
+
+        Returns:
+            One summarize_all result per article
+        """
+        if not contents:
+            return []
+        workers = min(max_workers, len(contents))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(
+                lambda content: self.summarize_all(content, existing_categories),
+                contents))
+
+    @staticmethod
+    def _copy_summary(summary: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy a cached summary so callers cannot mutate the cache."""
+        return {key: list(value) if isinstance(value, list) else value
+                for key, value in summary.items()}
+
+    @staticmethod
+    def _parse_summary(text: str) -> Dict[str, Any]:
+        """Parse the JSON object from a summary response, ignoring stray prose."""
+        try:
+            fields = json.loads(text)
+        except ValueError:
+            match = re.search(r"\{.*\}", text, re.DOTALL)
+            if not match:
+                raise ValueError("No JSON object in summary response")
+            fields = json.loads(match.group(0))
+        if not isinstance(fields, dict):
+            raise ValueError("Summary response is not a JSON object")
+        return fields
+
+    @staticmethod
+    def _clean_lines(content: str) -> List[str]:
+        """Strip front matter, empty lines and markdown header markers."""
+        # Extract content without front matter
+        content_without_front_matter = content.split(
+            "---", 1)[1] if "---" in content else content
+
+        # Clean up the content
+        content_lines = content_without_front_matter.strip().split("\n")
+        # Remove empty lines and clean up markdown headers
+        clean_lines = []
+        for line in content_lines:
+            line = line.strip()
+            if not line:
+                continue
+            # Remove markdown header markers but preserve the text
+            if line.startswith('#'):
+                line = line.lstrip('#').strip()
+            clean_lines.append(line)
+        return clean_lines
+
+    @staticmethod
+    def _clean_title(title: str, clean_lines: List[str]) -> str:
+        """Normalize a generated title, falling back to the first content line."""
+        title = title.translate(_MARKUP_TABLE).strip()
+
+        # If title is still too long, truncate it
+        if len(title) > 100:
+            title = title[:97] + "..."
+
+        # If title is empty, use the first non-empty line from the content
+        if not title and clean_lines:
+            title = clean_lines[0][:97] + \
+                "..." if len(clean_lines[0]) > 100 else clean_lines[0]
+
+        return title
+
+    @staticmethod
+    def _clean_subtitle(subtitle: str) -> str:
+        """Normalize a generated subtitle to one sentence of at most 50 characters."""
+        # Clean up the subtitle
+        subtitle = subtitle.translate(_MARKUP_TABLE).strip()
+
+        # Remove any existing periods or ellipsis
+        subtitle = subtitle.rstrip('。.…')
+
+        # Process the subtitle
+        if len(subtitle) > 46:
+            # For long subtitles, truncate and add ellipsis
+            # Remove any trailing punctuation
+            subtitle = subtitle[:46].rstrip(',.。!?！？、，')
+            return subtitle + "..."
+        else:
+            # For short subtitles, add period
+            return subtitle + "。"
+
+    @staticmethod
+    def _clean_tags(tags: List[str]) -> List[str]:
+        """Normalize generated tags to exactly three slug-style tags."""
+        tags = [tag.strip() for tag in tags if tag.strip()][:3]
+
+        # Clean up tags
+        cleaned_tags = []
+        for tag in tags:
+            # Remove any non-alphanumeric characters except hyphens
+            cleaned = _TAG_DROP_RE.sub('', tag)
+            # Remove consecutive hyphens
+            cleaned = _HYPHEN_RUN_RE.sub('-', cleaned)
+            # Remove leading/trailing hyphens
+            cleaned = cleaned.strip('-')
+            # Convert to lowercase
+            cleaned = cleaned.lower()
+            if cleaned:
+                cleaned_tags.append(cleaned)
+
+        # If we don't have enough tags, add generic ones
+        while len(cleaned_tags) < 3:
+            cleaned_tags.append(f"tag-{len(cleaned_tags)+1}")
+
+        return cleaned_tags[:3]  # Ensure we return exactly 3 tags
+
+    @staticmethod
+    def _pick_existing_category(category: str, clean_content: str,
+                                existing_categories: List[str]) -> str:
+        """Keep a generated category only if it is one of the existing ones."""
+        # If no valid category is returned, use the most appropriate existing one
+        if not category or category not in existing_categories:
+            # For Python/programming content, prefer software engineering related categories
+            if any(word in clean_content.lower() for word in ['python', 'programming', 'code', 'software']):
+                for preferred in ['软件工程', 'AI编程', '工程效率']:
+                    if preferred in existing_categories:
+                        return preferred
+            # Default to the first category if no better match
+            return existing_categories[0]
+        return category
+
+    @staticmethod
+    def _clean_category(category: str) -> str:
+        """Normalize a generated category, allowing new ones of up to 3 words."""
+        # Validate the category
+        if not category:
+            return "个人观点"  # Default category
+
+        # Clean up the category
+        category = category.translate(_MARKUP_TABLE).strip()
+
+        # If category is not in predefined list, ensure it's valid
+        if category not in OpenRouterService.PREDEFINED_CATEGORIES:
+            # Ensure it's not too long
+            words = category.split()
+            if len(words) > 3:
+                category = " ".join(words[:3])
+
+            # Ensure it only contains valid characters
+            category = "".join(c for c in category
+                               if c.isalnum() or c.isspace() or '\u4e00' <= c <= '\u9fff')
+
+        return category.strip()
+
+    @staticmethod
+    def _clean_keywords(keywords_text: str) -> List[str]:
+        """Split comma-separated keywords into up to 20 unique, short keywords."""
         # Split the comma-separated keywords and clean them
         raw_keywords = [kw.strip() for kw in keywords_text.split(',')]
 
@@ -367,12 +516,7 @@ class OpenRouterService:
         keywords = []
         for keyword in raw_keywords:
             # Remove any quotes or special characters
-            clean_keyword = (keyword
-                             .replace('"', '')
-                             .replace("'", "")
-                             .replace("[", "")
-                             .replace("]", "")
-                             .strip())
+            clean_keyword = keyword.translate(_KEYWORD_TABLE).strip()
 
             # Skip empty keywords
             if not clean_keyword:
@@ -393,6 +537,35 @@ class OpenRouterService:
 
         return keywords
 
+    def _complete(self, messages: List[Dict[str, str]], **params: Any) -> str:
+        """Send one chat completion, answering repeats from the cache.
+
+        Args:
+            messages: Chat messages to send
+            **params: Sampling parameters passed through to the API
+
+        Returns:
+            The response text from the API
+        """
+        if self.cache is None:
+            response = self.client.chat.completions.create(
+                model=self.MODEL, messages=messages, **params)
+            return response.choices[0].message.content
+
+        # The key covers everything that shapes the answer
+        key = hashlib.blake2b(json.dumps(
+            [self.MODEL, messages, params],
+            ensure_ascii=False, sort_keys=True).encode("utf-8")).digest()
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        response = self.client.chat.completions.create(
+            model=self.MODEL, messages=messages, **params)
+        text = response.choices[0].message.content
+        self.cache.set(key, text)
+        return text
+
     def _get_response_with_retry(self, prompt: str, max_retries: int = 3) -> str:
         """
         Get response from OpenRouter API with retry mechanism.
@@ -409,8 +582,7 @@ class OpenRouterService:
         """
         for attempt in range(max_retries):
             try:
-                response = self.client.chat.completions.create(
-                    model="deepseek/deepseek-v3-base:free",
+                response = self._complete(
                     messages=[
                         {
                             "role": "user",
@@ -421,7 +593,7 @@ class OpenRouterService:
                     max_tokens=50,    # Keep responses concise
                     top_p=0.8        # More focused token selection
                 )
-                return response.choices[0].message.content.strip()
+                return response.strip()
             except Exception as e:
                 if attempt == max_retries - 1:  # Last attempt
                     raise RuntimeError(
@@ -0,0 +1,95 @@
+"""Scoped memoization of filesystem existence checks.
+
+Scanning a source tree checks the same image paths over and over (several
+articles often share one image, and most images live in a handful of
+directories). Inside an ``existence_cache()`` block each directory is listed
+once with ``os.scandir`` and lookups become set membership tests; outside of
+it ``path_exists`` is a plain ``os.path.exists`` so long-lived callers never
+see stale results.
+"""
+
+import os
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Set
+
+
+class _ScanCache:
+    """Directory listings and confirmed misses collected during one scan."""
+
+    def __init__(self) -> None:
+        # None marks a directory that does not exist at all
+        self.entries: Dict[str, Optional[Set[str]]] = {}
+        self.missing: Set[str] = set()
+
+
+_scan_cache: Optional[_ScanCache] = None
+
+
+@contextmanager
+def existence_cache() -> Iterator[None]:
+    """Memoize ``path_exists`` results for the duration of the block.
+
+    Nested blocks share the outermost cache.
+    """
+    global _scan_cache
+    if _scan_cache is not None:
+        yield
+        return
+    _scan_cache = _ScanCache()
+    try:
+        yield
+    finally:
+        _scan_cache = None
+
+
+def _list_dir(directory: str) -> Optional[Set[str]]:
+    """Names of the existing files and directories in ``directory``.
+
+    Returns None when ``directory`` itself does not exist.
+    """
+    try:
+        with os.scandir(directory) as it:
+            # is_file/is_dir follow symlinks, so broken links are left out
+            return {entry.name for entry in it
+                    if entry.is_file() or entry.is_dir()}
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    except OSError:
+        return set()
+
+
+def path_exists(path: str) -> bool:
+    """Return whether ``path`` exists, using the active cache if any.
+
+    Args:
+        path: Absolute, normalized path to check
+
+    Returns:
+        True if the path exists
+    """
+    cache = _scan_cache
+    if cache is None:
+        return os.path.exists(path)
+
+    directory, name = os.path.split(path)
+    if directory in cache.entries:
+        names = cache.entries[directory]
+    else:
+        names = _list_dir(directory)
+        cache.entries[directory] = names
+    if names is None:
+        # Nothing can exist inside a missing directory; skip the stat
+        return False
+    if name in names:
+        return True
+    if path in cache.missing:
+        return False
+
+    # Not in the listing. Confirm with a real stat so that case-insensitive
+    # filesystems keep their usual os.path.exists semantics.
+    existed = os.path.exists(path)
+    if existed:
+        names.add(name)
+    else:
+        cache.missing.add(path)
+    return existed
@@ -1,7 +1,11 @@
 import os
 import pickle
+import sqlite3
+import threading
+from collections.abc import Mapping
 from datetime import datetime
 import hashlib
+from typing import Iterator
 from .error_handler import (
     error_handler,
     FileSystemError,
@@ -11,19 +15,131 @@ from .error_handler import (
 )
 
 
+# 旧版本 Python 没有 hashlib.file_digest 时分块读取的大小
+DIGEST_CHUNK_SIZE = 1024 * 1024
+
+
+def _hash_file(fp, name: str) -> str:
+    """Hex digest of an open binary file, read in chunks rather than all at once"""
+    if hasattr(hashlib, "file_digest"):
+        return hashlib.file_digest(fp, name).hexdigest()
+    hasher = hashlib.new(name)
+    for chunk in iter(lambda: fp.read(DIGEST_CHUNK_SIZE), b""):
+        hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+class _CacheTable(Mapping):
+    """Read-only dict view of the cache table: digest -> [media_id, media_url]"""
+
+    def __init__(self, conn: sqlite3.Connection, lock: threading.Lock) -> None:
+        self._conn = conn
+        self._lock = lock
+
+    def __getitem__(self, digest: str) -> list:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT media_id, media_url FROM cache WHERE digest = ?",
+                (digest,)).fetchone()
+        if row is None:
+            raise KeyError(digest)
+        return list(row)
+
+    def __contains__(self, digest: object) -> bool:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT 1 FROM cache WHERE digest = ? LIMIT 1",
+                (digest,)).fetchone() is not None
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            rows = self._conn.execute("SELECT digest FROM cache").fetchall()
+        return (digest for (digest,) in rows)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM cache").fetchone()[0]
+
+
 class WxCache:
+    """图片和文章的 media_id 缓存，保存在文章源目录的 Cache.sqlite 中。
+
+    查询和写入都是单条 SQL，启动时不需要把整个缓存读入内存。
+    """
 
     def dump_cache(self):
         """Dump cache to file"""
+        # 每次写入都已提交；这里把 WAL 合并回主库文件
         try:
-            with open(self.CACHE_STORE, "wb") as fp:
-                pickle.dump(self.CACHE, fp)
-        except Exception as e:
+            with self._lock:
+                self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        except sqlite3.Error as e:
             raise CacheError(
                 f"Failed to dump cache to {self.CACHE_STORE}: {str(e)}")
 
+    def close(self):
+        """Close the cache database"""
+        with self._lock:
+            self._conn.close()
+
+    def __put(self, digest: str, media_id: str, media_url: str) -> None:
+        """Insert or replace the entry for digest"""
+        try:
+            with self._lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO cache (digest, media_id, media_url) "
+                    "VALUES (?, ?, ?)", (digest, media_id, media_url))
+        except sqlite3.Error as e:
+            raise CacheError(
+                f"Failed to write cache {self.CACHE_STORE}: {str(e)}")
+
+    def __import_legacy(self) -> None:
+        """Import Cache.bin (pickled dict) or Cache.log (pickle records) once"""
+        legacy_bin = os.path.join(self.ROOT_DIR, "Cache.bin")
+        legacy_log = os.path.join(self.ROOT_DIR, "Cache.log")
+        if os.path.exists(legacy_log):
+            legacy_store = legacy_log
+        elif os.path.exists(legacy_bin):
+            legacy_store = legacy_bin
+        else:
+            return
+
+        rows = []
+        try:
+            with open(legacy_store, "rb") as fp:
+                if legacy_store == legacy_bin:
+                    rows = [(digest, media_id, media_url) for digest,
+                            (media_id, media_url) in pickle.load(fp).items()]
+                else:
+                    unpickler = pickle.Unpickler(fp)
+                    while True:
+                        try:
+                            rows.append(tuple(unpickler.load()))
+                        except (EOFError, pickle.UnpicklingError):
+                            # 文件末尾，或中断写入留下的半条记录
+                            break
+        except Exception as e:
+            raise CacheError(
+                f"Failed to load cache from {legacy_store}: {str(e)}")
+
+        # 日志中同一摘要以最后一条为准；数据库中已有的条目比旧文件新，保留不覆盖
+        latest = {digest: (media_id, media_url)
+                  for digest, media_id, media_url in rows}
+        try:
+            with self._lock, self._conn:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO cache (digest, media_id, media_url) "
+                    "VALUES (?, ?, ?)",
+                    [(digest, *value) for digest, value in latest.items()])
+        except sqlite3.Error as e:
+            raise CacheError(
+                f"Failed to import {legacy_store} into {self.CACHE_STORE}: {str(e)}")
+        os.replace(legacy_store, legacy_store + ".migrated")
+
     def __init__(self, root_dir: str = None) -> None:
-        self.CACHE = {}
+        # (路径, 算法) -> ((mtime_ns, size, inode), digest)，文件未变时不重新计算摘要
+        self._digests = {}
 
         # Get root directory
         if root_dir is None:
@@ -42,22 +158,37 @@ class WxCache:
             raise FileSystemError(f"Not a directory: {self.ROOT_DIR}")
 
         # Set up cache file
-        self.CACHE_STORE = os.path.join(self.ROOT_DIR, "Cache.bin")
+        self.CACHE_STORE = os.path.join(self.ROOT_DIR, "Cache.sqlite")
 
-        # Load existing cache or create new one
-        if os.path.exists(self.CACHE_STORE):
-            try:
-                with open(self.CACHE_STORE, "rb") as fp:
-                    self.CACHE = pickle.load(fp)
-            except Exception as e:
-                raise CacheError(
-                    f"Failed to load cache from {self.CACHE_STORE}: {str(e)}")
-        else:
-            try:
-                self.dump_cache()
-            except Exception as e:
-                raise CacheError(
-                    f"Failed to initialize cache at {self.CACHE_STORE}: {str(e)}")
+        # Open existing cache or create new one
+        self._lock = threading.Lock()
+        try:
+            self._conn = sqlite3.connect(
+                self.CACHE_STORE, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS cache ("
+                    "digest TEXT PRIMARY KEY, media_id TEXT, media_url TEXT)")
+        except sqlite3.Error as e:
+            raise CacheError(
+                f"Failed to initialize cache at {self.CACHE_STORE}: {str(e)}")
+        self.CACHE = _CacheTable(self._conn, self._lock)
+
+        # 旧版本的缓存文件导入成功后会被改名；仍然存在说明尚未导入
+        # （或上次导入失败），此时重新导入
+        self.__import_legacy()
+        # 只有存在 md5 (32 位十六进制) 键时，未命中才需要再按 md5 查找
+        self._has_md5_keys = self.__detect_md5_keys()
+
+    def __detect_md5_keys(self) -> bool:
+        """Whether the table still holds entries keyed by a legacy md5 digest"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM cache WHERE length(digest) = 32 LIMIT 1"
+            ).fetchone()
+        return row is not None
 
     def __get(self, key: str) -> list:
         """Get value from cache"""
@@ -69,8 +200,7 @@ class WxCache:
         """Set cache entry for file"""
         try:
             digest = self.__file_digest(file_path)
-            self.CACHE[digest] = [media_id, media_url]
-            self.dump_cache()
+            self.__put(digest, media_id, media_url)
         except Exception as e:
             error_handler.handle_error(e, {
                 "file": file_path,
@@ -82,8 +212,7 @@ class WxCache:
     def get(self, file_path: str) -> list:
         """Get cache entry for file"""
         try:
-            digest = self.__file_digest(file_path)
-            return self.__get(digest)
+            return self.__lookup(file_path)
         except Exception as e:
             error_handler.handle_error(e, {"file": file_path})
             return None
@@ -94,8 +223,7 @@ class WxCache:
         """Update cache entry for file"""
         try:
             digest = self.__file_digest(file_path)
-            self.CACHE[digest] = [media_id, media_url]
-            self.dump_cache()
+            self.__put(digest, media_id, media_url)
         except Exception as e:
             error_handler.handle_error(e, {
                 "file": file_path,
@@ -104,25 +232,43 @@ class WxCache:
             })
             raise
 
-    def __file_digest(self, file_path: str) -> str:
+    def __file_digest(self, file_path: str, name: str = "sha256") -> str:
         """Calculate file digest"""
         try:
-            if not os.path.exists(file_path):
+            try:
+                st = os.stat(file_path)
+            except FileNotFoundError:
                 raise FileSystemError(f"File does not exist: {file_path}")
 
-            md5 = hashlib.md5()
+            stamp = (st.st_mtime_ns, st.st_size, st.st_ino)
+            known = self._digests.get((file_path, name))
+            if known is not None and known[0] == stamp:
+                return known[1]
+
+            # 默认用 sha256：在有 SHA 指令的 CPU 上比 md5 快一倍以上
             with open(file_path, "rb") as f:
-                md5.update(f.read())
-            return md5.hexdigest()
+                digest = _hash_file(f, name)
+            self._digests[(file_path, name)] = (stamp, digest)
+            return digest
         except Exception as e:
             error_handler.handle_error(e, {"file": file_path})
             raise
 
+    def __lookup(self, file_path: str) -> list:
+        """Find the entry for file, moving an md5-keyed entry to its sha256 key"""
+        digest = self.__file_digest(file_path)
+        value = self.__get(digest)
+        if value is None and self._has_md5_keys:
+            # 旧版本以 md5 为键；只在未命中时计算，找到后改存到新键下
+            value = self.__get(self.__file_digest(file_path, "md5"))
+            if value is not None:
+                self.__put(digest, *value)
+        return value
+
     def is_cached(self, file_path: str) -> bool:
         """Check if file is cached"""
         try:
-            digest = self.__file_digest(file_path)
-            return self.__get(digest) is not None
+            return self.__lookup(file_path) is not None
         except Exception as e:
             error_handler.handle_error(e, {"file": file_path})
             return False
@@ -1,3 +1,4 @@
+import functools
 import markdown
 from markdown.extensions import codehilite
 from pyquery import PyQuery
@@ -9,6 +10,9 @@ import re
 import tempfile
 from datetime import datetime
 
+# 每个 WxHtmler 缓存的渲染结果数
+RENDER_CACHE_SIZE = 32
+
 
 class WxHtmler:
 
@@ -17,9 +21,11 @@ class WxHtmler:
         self.uploaded_images = {}
         self.debug = True  # 默认关闭调试模式
         self.debug_dir = os.path.join(self.assets_dir, "wx_html_debug")
-        # 确保调试目录存在
-        if not os.path.exists(self.debug_dir):
-            os.makedirs(self.debug_dir)
+        # 确保调试目录存在；多个进程同时创建时不报错
+        os.makedirs(self.debug_dir, exist_ok=True)
+        # 同一内容只渲染一次；缓存跟随实例，不会让实例常驻内存
+        self._render_cached = functools.lru_cache(
+            maxsize=RENDER_CACHE_SIZE)(self._render)
 
     def generate_article(self, md_file: MarkdownFile) -> dict:
         """生成文章对象"""
@@ -44,8 +50,21 @@ class WxHtmler:
         return article
 
     def render_markdown(self, content: str, uploaded_images: dict = None) -> str:
-        """渲染 Markdown 内容为 HTML"""
-        html_content = self.md_to_original_html(content, uploaded_images)
+        """渲染 Markdown 内容为 HTML
+
+        渲染结果只取决于内容和模板目录，按 (assets_dir, content) 缓存；
+        uploaded_images 仍然记录到 self.uploaded_images。
+        调试模式下每次都重新渲染，保证每次都写出调试文件
+        """
+        if uploaded_images:
+            self.uploaded_images = uploaded_images
+        if self.debug:
+            return self._render(self.assets_dir, content)
+        return self._render_cached(self.assets_dir, content)
+
+    def _render(self, assets_dir: str, content: str) -> str:
+        """实际的渲染过程，assets_dir 只用作缓存键"""
+        html_content = self.md_to_original_html(content)
         return self.__css_beautify(html_content)
 
     def md_to_original_html(self, content: str, uploaded_images: dict = None) -> str:
@@ -188,6 +207,9 @@ class WxHtmler:
 
     def update_image_urls(self, content: str, uploaded_images: Dict) -> str:
         """更新内容中的图片URL"""
+        # 没有可替换的图片时直接返回，不必逐个扫描全文
+        if not uploaded_images or "![" not in content:
+            return content
         content_copy = content
         for image, meta in uploaded_images.items():
             content_copy = content_copy.replace(f"({image})", f"({meta[1]})")
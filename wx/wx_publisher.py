@@ -8,6 +8,9 @@ from .wx_htmler import WxHtmler
 from .image_processor import ImageProcessor
 from .wx_client import WxClient
 
+# 微信草稿接口一次最多接受 8 篇文章
+MAX_ARTICLES_PER_DRAFT = 8
+
 
 class WxPublisher:
     def __init__(self, wx_cache: WxCache):
@@ -17,7 +20,11 @@ class WxPublisher:
         self.image_processor = ImageProcessor(self.client, wx_cache)
 
     def publish_multi_articles(self, md_files: list[MarkdownFile]) -> list[str]:
-        """发布多个文章"""
+        """发布多个文章
+
+        每批最多 MAX_ARTICLES_PER_DRAFT 篇文章组成一个草稿，
+        返回各草稿的 media_id，同一批文章在缓存中记录同一个 media_id
+        """
         articles = []
         to_publish = []  # 记录要发布的文章
         for md_file in md_files:
@@ -34,10 +41,15 @@ class WxPublisher:
                 to_publish.append(md_file)  # 记录这篇文章需要发布
         if not articles:
             return []
-        media_ids = self.client.upload_article_draft(articles)
-        # 只更新需要发布的文章的缓存
-        for i, media_id in enumerate(media_ids):
-            self.cache.update(to_publish[i].abs_path, media_id)
+        # 按接口上限分批上传，每批只发一次请求，得到该批草稿的 media_id
+        media_ids = []
+        for start in range(0, len(articles), MAX_ARTICLES_PER_DRAFT):
+            end = start + MAX_ARTICLES_PER_DRAFT
+            media_id = self.client.upload_article_draft(articles[start:end])
+            media_ids.append(media_id)
+            # 只更新需要发布的文章的缓存
+            for md_file in to_publish[start:end]:
+                self.cache.update(md_file.abs_path, media_id)
         return media_ids
 
     def assembling_article(self, md_file: MarkdownFile) -> dict:
@@ -81,7 +93,7 @@ class WxPublisher:
         article = self.assembling_article(md_file)
         if not article:
             return self.cache.get(md_file.abs_path)
-        media_ids = self.client.upload_article_draft([article])
-        media_id = media_ids[0]  # 获取第一个（也是唯一的）media_id
+        # 接口为整个草稿返回一个 media_id
+        media_id = self.client.upload_article_draft([article])
         self.cache.update(md_file.abs_path, media_id)
         return media_id